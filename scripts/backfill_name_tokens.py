@@ -0,0 +1,93 @@
+"""
+Database Migration Script: backfill nameTokens
+==============================================
+
+Adds the normalized name tokens used by index-backed name search
+(users.utils.name_search) to users created before they existed.
+
+IMPORTANT:
+- Run after deploying the version that maintains nameTokens on write
+- This script is idempotent and resumable - it walks users in _id order and
+  only touches documents without nameTokens (or all with --all)
+
+Usage:
+    python scripts/backfill_name_tokens.py [--all] [--batch-size 1000]
+
+Environment Variables Required:
+    MONGODB_URI - MongoDB connection string
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+
+from users.utils.name_search import name_tokens
+
+# MongoDB connection
+MONGODB_URI = os.getenv("MONGODB_URI", "mongodb://localhost:27017")
+DATABASE_NAME = os.getenv("DATABASE_NAME", "test")
+
+
+async def backfill(rebuild_all: bool, batch_size: int):
+    print(f"Connecting to MongoDB: {MONGODB_URI}")
+    client = AsyncIOMotorClient(MONGODB_URI)
+    users_collection = client[DATABASE_NAME]["users"]
+
+    base_filter = {} if rebuild_all else {"nameTokens": {"$exists": False}}
+    pending = await users_collection.count_documents(base_filter)
+    print(f"Users to backfill: {pending}")
+
+    last_id = None
+    updated = 0
+    started = time.perf_counter()
+    while True:
+        query = dict(base_filter)
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        batch = (
+            await users_collection.find(query, {"firstName": 1, "lastName": 1})
+            .sort("_id", 1)
+            .limit(batch_size)
+            .to_list(length=batch_size)
+        )
+        if not batch:
+            break
+
+        ops = [
+            UpdateOne(
+                {"_id": doc["_id"]},
+                {
+                    "$set": {
+                        "nameTokens": name_tokens(
+                            doc.get("firstName", ""), doc.get("lastName", "")
+                        )
+                    }
+                },
+            )
+            for doc in batch
+        ]
+        result = await users_collection.bulk_write(ops, ordered=False)
+        updated += result.modified_count
+        last_id = batch[-1]["_id"]
+        rate = updated / max(time.perf_counter() - started, 1e-9)
+        print(f"  {updated}/{pending} users updated ({rate:,.0f}/s)")
+
+    print(f"✓ Backfill complete: {updated} users updated")
+    client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--all", action="store_true", help="recompute tokens for every user"
+    )
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(backfill(args.all, args.batch_size))
@@ -0,0 +1,205 @@
+"""
+Microbenchmark for bearer-token verification in users.utils.security.
+
+Runs entirely in-process against a freshly generated RSA key, no IdP needed:
+
+    python scripts/bench_auth.py --iterations 2000
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from fastapi import HTTPException
+from jose import jwk, jwt
+
+from users.utils import security
+from users.utils.redis_client import redis_client
+
+KID = "bench-key"
+
+
+def make_keypair():
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    private_pem = private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    public_pem = private_key.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    public_jwk = jwk.construct(public_pem, "RS256").to_dict()
+    public_jwk["kid"] = KID
+    return private_pem, public_jwk
+
+
+def make_token(private_pem: bytes, **claims) -> str:
+    payload = {
+        "sub": "bench-user",
+        "roles": ["ROLE_ADMIN"],
+        "exp": int(time.time()) + 3600,
+    }
+    payload.update(claims)
+    return jwt.encode(payload, private_pem, algorithm="RS256", headers={"kid": KID})
+
+
+def report(label: str, iterations: int, elapsed: float, baseline: float = None):
+    rate = iterations / elapsed
+    line = f"{label:<38} {rate:>12,.0f} /s {elapsed / iterations * 1e6:>10.1f} us/op"
+    if baseline:
+        line += f"   x{rate / baseline:.1f}"
+    print(line)
+    return rate
+
+
+def bench_sync(fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return time.perf_counter() - start
+
+
+async def bench_async(fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await fn()
+    return time.perf_counter() - start
+
+
+decode = security.JWTValidator._decode
+
+
+async def burst(validator, tokens) -> tuple:
+    """Verify a burst of new tokens concurrently; return (elapsed, max loop lag)."""
+    max_lag = 0.0
+    done = False
+
+    async def ticker():
+        nonlocal max_lag
+        while not done:
+            before = time.perf_counter()
+            await asyncio.sleep(0.001)
+            max_lag = max(max_lag, time.perf_counter() - before - 0.001)
+
+    tick = asyncio.ensure_future(ticker())
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    await asyncio.gather(*[validator.verify_token(t) for t in tokens])
+    elapsed = time.perf_counter() - start
+    done = True
+    await tick
+    return elapsed, max_lag
+
+
+def percentiles(samples: list) -> str:
+    samples = sorted(samples)
+    p50 = samples[len(samples) // 2]
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    return f"p50 {p50 * 1e6:>8.1f} us   p99 {p99 * 1e6:>8.1f} us"
+
+
+async def bench_replay_guard(validator, token: str, iterations: int):
+    try:
+        await redis_client.connect()
+        backend = "in-process filter + Redis SET NX EX"
+    except Exception:
+        redis_client.client = None
+        backend = "in-process filter only (Redis unreachable)"
+    print(f"replay guard backend: {backend}")
+
+    exp = int(time.time()) + 3600
+    without, with_guard, replay = [], [], []
+    for i in range(iterations):
+        start = time.perf_counter()
+        await validator.verify_token(token)
+        without.append(time.perf_counter() - start)
+
+        payload = {"jti": f"bench-{time.time_ns()}-{i}", "exp": exp}
+        start = time.perf_counter()
+        await validator.verify_token(token)
+        await validator.validate_jti(payload)
+        with_guard.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        try:
+            await validator.validate_jti(payload)
+        except HTTPException:
+            pass
+        replay.append(time.perf_counter() - start)
+
+    print(f"{'warm token, no replay guard':<38} {percentiles(without)}")
+    print(f"{'warm token + replay guard':<38} {percentiles(with_guard)}")
+    print(f"{'replay rejected in-process':<38} {percentiles(replay)}")
+    await redis_client.close()
+
+
+async def main(iterations: int):
+    private_pem, public_jwk = make_keypair()
+    token = make_token(private_pem)
+
+    cache = security.JWKSCache("http://unused", snapshot_path="")
+    cache._apply({"keys": [public_jwk]}, time.time())
+    validator = security.JWTValidator(cache)
+    prebuilt_key = cache.keys[KID]
+
+    print(f"iterations={iterations}")
+    base = report(
+        "jwt.decode, raw JWK dict",
+        iterations,
+        bench_sync(lambda: decode(token, public_jwk), iterations),
+    )
+    report(
+        "jwt.decode, pre-built Key",
+        iterations,
+        bench_sync(lambda: decode(token, prebuilt_key), iterations),
+        base,
+    )
+
+    # Unique tokens so every call misses the verified-token cache
+    tokens = iter([make_token(private_pem, jti=str(i)) for i in range(iterations)])
+    report(
+        "verify_token, cache miss",
+        iterations,
+        await bench_async(lambda: validator.verify_token(next(tokens)), iterations),
+        base,
+    )
+    report(
+        "verify_token, cache hit",
+        iterations,
+        await bench_async(lambda: validator.verify_token(token), iterations),
+        base,
+    )
+
+    # Burst of new tokens, as after a fleet restart of downstream callers
+    burst_size = min(iterations, security.config.JWT_VERIFY_QUEUE_SIZE)
+    for offload in (False, True):
+        security.config.JWT_VERIFY_OFFLOAD = offload
+        fresh = security.JWTValidator(cache)
+        tokens = [make_token(private_pem, jti=f"b{i}") for i in range(burst_size)]
+        elapsed, max_lag = await burst(fresh, tokens)
+        label = f"burst of {burst_size}, offload={'on' if offload else 'off'}"
+        print(
+            f"{label:<38} {elapsed * 1000:>10.1f} ms total, "
+            f"max event-loop stall {max_lag * 1000:.1f} ms"
+        )
+        fresh.close()
+    security.config.JWT_VERIFY_OFFLOAD = False
+
+    await bench_replay_guard(validator, token, iterations)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+    # Keep per-request warnings (replays, Redis fallback) out of the numbers
+    logging.disable(logging.WARNING)
+    asyncio.run(main(args.iterations))
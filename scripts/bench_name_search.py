@@ -0,0 +1,166 @@
+"""
+Benchmark name search: unanchored case-insensitive regex versus nameTokens.
+
+Loads synthetic users into a scratch database on a local mongod, creates the
+registered indexes and times both query forms for a handful of prefixes,
+reporting latency and documents examined (from explain):
+
+    python scripts/bench_name_search.py --users 1000000 --tenants 20
+
+Without a mongod, --tokenize-only measures just the write-path cost of
+computing nameTokens.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from pymongo import MongoClient
+
+from users.repositories.indexes import INDEXES
+from users.repositories.user_repository import PAGE_SORT
+from users.utils.name_search import name_tokens, search_terms, tokens_filter
+
+FIRST = [
+    "Anna",
+    "Ånne",
+    "Björn",
+    "Chloé",
+    "Dmitri",
+    "Émile",
+    "Fatima",
+    "Gareth",
+    "Hiroshi",
+    "Ingrid",
+    "José",
+    "Kwame",
+    "Léa",
+    "Mateo",
+    "Nadia",
+    "Oskar",
+]
+LAST = [
+    "Lindqvist",
+    "O'Brien",
+    "Müller",
+    "García",
+    "Nakamura",
+    "Kowalski",
+    "Dubois",
+    "Ngata",
+    "Smith-Jones",
+    "Rossi",
+    "Ivanova",
+    "Haddad",
+    "Andersen",
+    "Silva",
+]
+PREFIXES = ["an", "lind", "mull", "gar", "o brien", "ann lin"]
+
+
+def make_user(rng: random.Random, tenants: int, i: int) -> dict:
+    first = rng.choice(FIRST) + ("" if i % 3 else str(i % 97))
+    last = rng.choice(LAST)
+    return {
+        "firstName": first,
+        "lastName": last,
+        "email": f"user{i}@bench.example.com",
+        "tenantId": f"tenant-{i % tenants}",
+        "enabled": True,
+        "confirmed": True,
+        "roleIds": [],
+        "attributes": {"status": "Active"},
+        "nameTokens": name_tokens(first, last),
+    }
+
+
+def bench_tokenize(iterations: int):
+    rng = random.Random(1)
+    names = [(rng.choice(FIRST), rng.choice(LAST)) for _ in range(iterations)]
+    start = time.perf_counter()
+    for first, last in names:
+        name_tokens(first, last)
+    elapsed = time.perf_counter() - start
+    sample = name_tokens("Annabel", "Lindqvist")
+    print(
+        f"name_tokens: {elapsed / iterations * 1e6:.1f} us/user, "
+        f"{len(sample)} tokens for 'Annabel Lindqvist'"
+    )
+
+
+def load(collection, users: int, tenants: int, batch: int = 10000):
+    rng = random.Random(42)
+    collection.drop()
+    start = time.perf_counter()
+    for offset in range(0, users, batch):
+        collection.insert_many(
+            [
+                make_user(rng, tenants, i)
+                for i in range(offset, min(users, offset + batch))
+            ],
+            ordered=False,
+        )
+    print(f"loaded {users:,} users in {time.perf_counter() - start:.1f}s")
+    collection.create_indexes(INDEXES["users"])
+
+
+def timed(collection, query: dict, limit: int, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        list(collection.find(query, {"_id": 1}).sort(PAGE_SORT).limit(limit))
+        samples.append(time.perf_counter() - start)
+    stats = (
+        collection.find(query).sort(PAGE_SORT).limit(limit).explain()["executionStats"]
+    )
+    return sorted(samples)[len(samples) // 2], stats["totalDocsExamined"]
+
+
+def main(args):
+    bench_tokenize(20000)
+    if args.tokenize_only:
+        return
+    client = MongoClient(args.uri, serverSelectionTimeoutMS=5000)
+    collection = client[args.db]["users"]
+    load(collection, args.users, args.tenants)
+    tenant = "tenant-0"
+    print(
+        f"{'prefix':<10} {'regex p50':>12} {'examined':>10} {'tokens p50':>12} {'examined':>10}"
+    )
+    for prefix in PREFIXES:
+        regex = {
+            "tenantId": tenant,
+            "$or": [
+                {"firstName": {"$regex": prefix, "$options": "i"}},
+                {"lastName": {"$regex": prefix, "$options": "i"}},
+            ],
+        }
+        tokens = {"tenantId": tenant, **tokens_filter(search_terms(prefix))}
+        r_time, r_docs = timed(collection, regex, args.limit, args.repeat)
+        t_time, t_docs = timed(collection, tokens, args.limit, args.repeat)
+        print(
+            f"{prefix:<10} {r_time * 1000:>10.2f}ms {r_docs:>10,} "
+            f"{t_time * 1000:>10.2f}ms {t_docs:>10,}"
+        )
+    if not args.keep:
+        client.drop_database(args.db)
+    client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--uri", default=os.getenv("MONGO_URI", "mongodb://localhost:27017")
+    )
+    parser.add_argument("--db", default="bench_name_search")
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--tenants", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--keep", action="store_true", help="keep the scratch database")
+    parser.add_argument("--tokenize-only", action="store_true")
+    main(parser.parse_args())
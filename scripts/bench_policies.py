@@ -0,0 +1,121 @@
+"""
+Microbenchmark for the attribute-based policy engine in
+users.services.policy_service.
+
+Compiles a synthetic policy set and times per-request evaluation, entirely
+in-process (no MongoDB needed):
+
+    python scripts/bench_policies.py --policies 300 --iterations 20000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from users.models.domain import Policy
+from users.services.policy_service import PolicySet, compile_condition
+
+DEPARTMENTS = ["eng", "sales", "support", "finance", "legal", "hr"]
+CONDITIONS = [
+    "attributes.department == resource.department",
+    "attributes.level >= {level} and not attributes.contractor",
+    "resource.tenantId == subject.tenantId and attributes.region in {regions}",
+    "'ROLE_ADMIN' in subject.roles or attributes.department == '{department}'",
+    "attributes.status != 'SUSPENDED' and resource.owner == subject.sub",
+]
+
+
+def make_policies(count: int, actions: int) -> list:
+    rng = random.Random(42)
+    policies = []
+    for i in range(count):
+        template = CONDITIONS[i % len(CONDITIONS)]
+        condition = template.format(
+            level=rng.randint(1, 5),
+            regions=rng.sample(["eu", "us", "apac", "latam"], 2),
+            department=rng.choice(DEPARTMENTS),
+        )
+        effect = "deny" if i % 10 == 0 else "allow"
+        action = "*" if i % 50 == 0 else f"resource{i % actions}:read"
+        policies.append(
+            Policy(
+                id=str(i),
+                name=f"policy-{i}",
+                actions=[action],
+                effect=effect,
+                condition=condition,
+            )
+        )
+    return policies
+
+
+def make_context(rng: random.Random) -> dict:
+    return {
+        "subject": {"sub": "u1", "tenantId": "t1", "roles": ["ROLE_USER"]},
+        "attributes": {
+            "department": rng.choice(DEPARTMENTS),
+            "level": rng.randint(1, 5),
+            "region": rng.choice(["eu", "us"]),
+            "status": "ACTIVE",
+        },
+        "resource": {"department": rng.choice(DEPARTMENTS), "tenantId": "t1"},
+    }
+
+
+def main(count: int, actions: int, iterations: int):
+    policies = make_policies(count, actions)
+
+    start = time.perf_counter()
+    compiled = [(p, compile_condition(p.condition)) for p in policies]
+    policy_set = PolicySet(compiled, 1)
+    compile_elapsed = time.perf_counter() - start
+    print(f"policies={count} actions={actions} iterations={iterations}")
+    print(
+        f"{'compile + index policy set':<34} {compile_elapsed * 1000:>10.2f} ms "
+        f"({compile_elapsed / count * 1e6:.1f} us/policy)"
+    )
+
+    rng = random.Random(7)
+    contexts = [make_context(rng) for _ in range(256)]
+    requests = [
+        (f"resource{rng.randrange(actions)}:read", contexts[i % len(contexts)])
+        for i in range(iterations)
+    ]
+
+    samples = []
+    allowed = 0
+    for action, context in requests:
+        context["action"] = action
+        start = time.perf_counter()
+        allowed += policy_set.evaluate(action, context)
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    p50 = samples[len(samples) // 2]
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    mean = sum(samples) / len(samples)
+    print(
+        f"{'evaluate per request':<34} mean {mean * 1e6:>6.2f} us   "
+        f"p50 {p50 * 1e6:>6.2f} us   p99 {p99 * 1e6:>6.2f} us"
+    )
+    print(f"{'allowed':<34} {allowed / iterations:>10.1%}")
+
+    # Same conditions interpreted from the AST on every request, for scale
+    sources = [p.condition for p in policies[:actions]]
+    start = time.perf_counter()
+    for i in range(min(iterations, 2000)):
+        compile_condition(sources[i % len(sources)])(contexts[i % len(contexts)])
+    reparse = (time.perf_counter() - start) / min(iterations, 2000)
+    print(f"{'parse + compile + evaluate one':<34} mean {reparse * 1e6:>6.2f} us")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--policies", type=int, default=300)
+    parser.add_argument("--actions", type=int, default=20)
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+    main(args.policies, args.actions, args.iterations)
@@ -0,0 +1,135 @@
+"""
+Benchmark building the JSON body of a hierarchy listing.
+
+Compares, for the same synthetic page of users (no MongoDB needed):
+
+  models + jsonable_encoder + json    validated models, FastAPI's default path
+  dicts  + jsonable_encoder + json    serialize_user output, default path
+  models + EnvelopeResponse           validated models, orjson
+  dicts  + EnvelopeResponse           serialize_user output, orjson (current)
+
+    python scripts/bench_response.py --users 5000 --repeat 10
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+
+from users.models.domain import User
+from users.repositories.user_repository import serialize_user
+from users.utils.response_util import EnvelopeResponse, page_response
+
+
+# Starlette's JSONResponse.render
+def stdlib_render(content) -> bytes:
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def make_doc(i: int) -> dict:
+    return {
+        "_id": ObjectId(),
+        "firstName": f"Annabel{i}",
+        "lastName": "Lindqvist",
+        "email": f"user{i}@example.com",
+        "enabled": True,
+        "confirmed": True,
+        "tenantId": "tenant-1",
+        "timezone": "Europe/Stockholm",
+        "roleIds": ["65f0c0ffee0000000000000a", "65f0c0ffee0000000000000b"],
+        "permissionIds": [],
+        "attributes": {"status": "Active", "department": "eng", "level": 3},
+        "createdAt": datetime(2024, 5, 1, 12, 0, 0, 123000),
+        "updatedAt": datetime(2024, 6, 1, 8, 30),
+        "createdBy": "admin",
+    }
+
+
+def to_model(doc: dict) -> User:
+    return User.model_validate({**doc, "_id": str(doc["_id"])})
+
+
+def envelope(data) -> dict:
+    # The dict success_response/page_response wrap, for the stdlib paths
+    return {
+        "status": "success",
+        "message": "Active users fetched successfully",
+        "data": data,
+        "timestamp": 0,
+        "next_cursor": None,
+    }
+
+
+def timed(build, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = build()
+        samples.append(time.perf_counter() - start)
+    return sorted(samples)[len(samples) // 2], body
+
+
+def main(users: int, repeat: int):
+    docs = [make_doc(i) for i in range(users)]
+    models = [to_model(d) for d in docs]
+    dicts = [serialize_user(d) for d in docs]
+
+    cases = [
+        (
+            "models + jsonable_encoder + json",
+            lambda: stdlib_render(jsonable_encoder(envelope(models))),
+        ),
+        (
+            "dicts  + jsonable_encoder + json",
+            lambda: stdlib_render(jsonable_encoder(envelope(dicts))),
+        ),
+        ("models + EnvelopeResponse", lambda: page_response(models, None).body),
+        ("dicts  + EnvelopeResponse", lambda: page_response(dicts, None).body),
+    ]
+    print(f"users={users} repeat={repeat} (median per response)")
+    baseline = None
+    reference = None
+    for name, build in cases:
+        elapsed, body = timed(build, repeat)
+        decoded = json.loads(body)
+        decoded["timestamp"] = 0
+        decoded["message"] = "Active users fetched successfully"
+        if reference is None:
+            reference, baseline = decoded, elapsed
+        same = "same body" if decoded == reference else "BODY DIFFERS"
+        print(
+            f"{name:<34} {elapsed * 1000:>9.1f} ms  {baseline / elapsed:>5.1f}x  "
+            f"{len(body) / 1024:>7.0f} KiB  {same}"
+        )
+
+    # End to end from driver documents: validate-and-encode versus the
+    # trusted path (serialize_user + orjson)
+    old, _ = timed(
+        lambda: stdlib_render(jsonable_encoder(envelope([to_model(d) for d in docs]))),
+        repeat,
+    )
+    new, _ = timed(
+        lambda: EnvelopeResponse(envelope([serialize_user(d) for d in docs])).body,
+        repeat,
+    )
+    print(
+        f"{'documents -> body, before':<34} {old * 1000:>9.1f} ms\n"
+        f"{'documents -> body, now':<34} {new * 1000:>9.1f} ms  {old / new:>5.1f}x"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    main(args.users, args.repeat)
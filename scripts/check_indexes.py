@@ -0,0 +1,42 @@
+"""
+Fail if any registered query shape would scan a whole collection.
+
+Creates the registered indexes in a scratch database on a local mongod and
+runs explain() for every shape in users.repositories.indexes.QUERY_SHAPES:
+
+    python scripts/check_indexes.py --uri mongodb://localhost:27017
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from pymongo import MongoClient
+
+from users.repositories.indexes import QUERY_SHAPES, find_collscans
+
+
+def main(uri: str, db_name: str, keep: bool) -> int:
+    client = MongoClient(uri, serverSelectionTimeoutMS=5000)
+    try:
+        failures = find_collscans(client[db_name])
+        for shape in QUERY_SHAPES:
+            print(f"{'COLLSCAN' if shape.name in failures else 'ok':<10} {shape.name}")
+        if not keep:
+            client.drop_database(db_name)
+    finally:
+        client.close()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--uri", default=os.getenv("MONGO_URI", "mongodb://localhost:27017")
+    )
+    parser.add_argument("--db", default="index_check")
+    parser.add_argument("--keep", action="store_true", help="keep the scratch database")
+    args = parser.parse_args()
+    sys.exit(main(args.uri, args.db, args.keep))
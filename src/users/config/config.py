@@ -13,6 +13,21 @@ class Config(BaseSettings):
     # ----------------------------
     MONGO_URI: str = "mongodb://localhost:27017"
     MONGO_DB_NAME: str = "test"
+    MONGO_MAX_POOL_SIZE: int = 100
+    # Connections opened at startup and kept open while idle
+    MONGO_MIN_POOL_SIZE: int = 10
+    MONGO_MAX_IDLE_TIME_MS: int = 300000
+    # How long a request may wait for a free pooled connection
+    MONGO_WAIT_QUEUE_TIMEOUT_MS: int = 2000
+    # Tried in order; ones whose library is not installed are skipped
+    MONGO_COMPRESSORS: str = "zstd,snappy,zlib"
+    MONGO_SERVER_SELECTION_TIMEOUT_MS: int = 5000
+    MONGO_CONNECT_TIMEOUT_MS: int = 5000
+    MONGO_SOCKET_TIMEOUT_MS: int = 20000
+    # Secondary reads never see data older than this (driver minimum is 90)
+    MONGO_MAX_STALENESS_SECONDS: int = 90
+    # After an admin write, that admin's secondary reads wait for it this long
+    MONGO_CAUSAL_WINDOW_SECONDS: int = 300
 
     # ----------------------------
     # Redis
@@ -24,6 +39,60 @@ class Config(BaseSettings):
     # OAuth / JWKS
     # ----------------------------
     JWKS_URL: str = "http://localhost:5055/oauth2/jwks"
+    # Last good JWKS, reused on cold start; empty disables the snapshot.
+    # Use a directory only the service can write: these keys are trusted.
+    JWKS_SNAPSHOT_PATH: str = ""
+    # Validated tokens kept per worker; 0 disables the cache
+    TOKEN_CACHE_MAX_SIZE: int = 10000
+    # Run RS256 verification on a bounded thread pool instead of the loop
+    JWT_VERIFY_OFFLOAD: bool = False
+    JWT_VERIFY_WORKERS: int = 4
+    JWT_VERIFY_QUEUE_SIZE: int = 64  # waiting verifications before 503
+    # Single-use tokens (jti) on require_role-protected routes
+    JWT_REPLAY_PROTECTION: bool = False
+
+    # ----------------------------
+    # Authorization
+    # ----------------------------
+    AUTHZ_REFRESH_SECONDS: int = 300  # full rebuild, in case events were missed
+    AUTHZ_SUBJECT_CACHE_TTL: int = 60
+    AUTHZ_SUBJECT_CACHE_SIZE: int = 10000
+    AUTHZ_CHECK_MAX_BATCH: int = 500  # tuples per POST /authz/check
+
+    # ----------------------------
+    # Service credentials (HMAC-signed internal calls)
+    # ----------------------------
+    SERVICE_AUTH_MAX_SKEW_SECONDS: int = 300  # accepted X-Timestamp drift
+    SERVICE_CREDENTIAL_CACHE_TTL: int = 60
+    # Admins with this role may issue credentials for any tenant, or none;
+    # other admins only for their own tenant
+    CROSS_TENANT_ADMIN_ROLE: str = "ROLE_SUPER_ADMIN"
+
+    # ----------------------------
+    # Pagination (user listings)
+    # ----------------------------
+    PAGE_SIZE_DEFAULT: int = 100
+    PAGE_SIZE_MAX: int = 1000  # larger ?limit= values are clamped to this
+    # Ids plus emails accepted by one POST /admin/users/batch
+    USER_BATCH_MAX: int = 1000
+    # Documents per cursor batch when streaming a listing as NDJSON; bounds
+    # the memory one export holds whatever the tenant size
+    STREAM_BATCH_SIZE: int = 500
+
+    # ----------------------------
+    # Bulk writes
+    # ----------------------------
+    # Operations per unordered bulk_write round trip
+    BULK_WRITE_CHUNK_SIZE: int = 1000
+
+    # ----------------------------
+    # Idempotency-Key (create/invite/register)
+    # ----------------------------
+    IDEMPOTENCY_TTL_SECONDS: int = 86400  # how long a response is replayed
+    # A claim outlives a crashed request by at most this long
+    IDEMPOTENCY_LOCK_SECONDS: int = 60
+    # How long a duplicate waits for the in-flight original before a 409
+    IDEMPOTENCY_WAIT_SECONDS: int = 10
 
     # ----------------------------
     # Audit
@@ -68,9 +137,42 @@ def _log_effective_config(cfg: Config):
     log.info("SERVICE_NAME=%s", cfg.SERVICE_NAME)
     log.info("ENVIRONMENT=%s", cfg.ENVIRONMENT)
     log.info("MONGO_DB_NAME=%s", cfg.MONGO_DB_NAME)
+    log.info("MONGO_MAX_POOL_SIZE=%s", cfg.MONGO_MAX_POOL_SIZE)
+    log.info("MONGO_MIN_POOL_SIZE=%s", cfg.MONGO_MIN_POOL_SIZE)
+    log.info("MONGO_MAX_IDLE_TIME_MS=%s", cfg.MONGO_MAX_IDLE_TIME_MS)
+    log.info("MONGO_WAIT_QUEUE_TIMEOUT_MS=%s", cfg.MONGO_WAIT_QUEUE_TIMEOUT_MS)
+    log.info("MONGO_COMPRESSORS=%s", cfg.MONGO_COMPRESSORS)
+    log.info(
+        "MONGO_SERVER_SELECTION_TIMEOUT_MS=%s", cfg.MONGO_SERVER_SELECTION_TIMEOUT_MS
+    )
+    log.info("MONGO_CONNECT_TIMEOUT_MS=%s", cfg.MONGO_CONNECT_TIMEOUT_MS)
+    log.info("MONGO_SOCKET_TIMEOUT_MS=%s", cfg.MONGO_SOCKET_TIMEOUT_MS)
+    log.info("MONGO_MAX_STALENESS_SECONDS=%s", cfg.MONGO_MAX_STALENESS_SECONDS)
+    log.info("MONGO_CAUSAL_WINDOW_SECONDS=%s", cfg.MONGO_CAUSAL_WINDOW_SECONDS)
     log.info("REDIS_HOST=%s", cfg.REDIS_HOST)
     log.info("REDIS_PORT=%s", cfg.REDIS_PORT)
     log.info("JWKS_URL=%s", cfg.JWKS_URL)
+    log.info("JWKS_SNAPSHOT_PATH=%s", cfg.JWKS_SNAPSHOT_PATH)
+    log.info("TOKEN_CACHE_MAX_SIZE=%s", cfg.TOKEN_CACHE_MAX_SIZE)
+    log.info("JWT_VERIFY_OFFLOAD=%s", cfg.JWT_VERIFY_OFFLOAD)
+    log.info("JWT_VERIFY_WORKERS=%s", cfg.JWT_VERIFY_WORKERS)
+    log.info("JWT_VERIFY_QUEUE_SIZE=%s", cfg.JWT_VERIFY_QUEUE_SIZE)
+    log.info("JWT_REPLAY_PROTECTION=%s", cfg.JWT_REPLAY_PROTECTION)
+    log.info("AUTHZ_REFRESH_SECONDS=%s", cfg.AUTHZ_REFRESH_SECONDS)
+    log.info("AUTHZ_SUBJECT_CACHE_TTL=%s", cfg.AUTHZ_SUBJECT_CACHE_TTL)
+    log.info("AUTHZ_SUBJECT_CACHE_SIZE=%s", cfg.AUTHZ_SUBJECT_CACHE_SIZE)
+    log.info("AUTHZ_CHECK_MAX_BATCH=%s", cfg.AUTHZ_CHECK_MAX_BATCH)
+    log.info("SERVICE_AUTH_MAX_SKEW_SECONDS=%s", cfg.SERVICE_AUTH_MAX_SKEW_SECONDS)
+    log.info("SERVICE_CREDENTIAL_CACHE_TTL=%s", cfg.SERVICE_CREDENTIAL_CACHE_TTL)
+    log.info("CROSS_TENANT_ADMIN_ROLE=%s", cfg.CROSS_TENANT_ADMIN_ROLE)
+    log.info("PAGE_SIZE_DEFAULT=%s", cfg.PAGE_SIZE_DEFAULT)
+    log.info("PAGE_SIZE_MAX=%s", cfg.PAGE_SIZE_MAX)
+    log.info("USER_BATCH_MAX=%s", cfg.USER_BATCH_MAX)
+    log.info("STREAM_BATCH_SIZE=%s", cfg.STREAM_BATCH_SIZE)
+    log.info("BULK_WRITE_CHUNK_SIZE=%s", cfg.BULK_WRITE_CHUNK_SIZE)
+    log.info("IDEMPOTENCY_TTL_SECONDS=%s", cfg.IDEMPOTENCY_TTL_SECONDS)
+    log.info("IDEMPOTENCY_LOCK_SECONDS=%s", cfg.IDEMPOTENCY_LOCK_SECONDS)
+    log.info("IDEMPOTENCY_WAIT_SECONDS=%s", cfg.IDEMPOTENCY_WAIT_SECONDS)
     log.info("AUDIT_COLLECTION=%s", cfg.AUDIT_COLLECTION)
     log.info("SMTP_HOST=%s", cfg.SMTP_HOST)
     log.info("SMTP_PORT=%s", cfg.SMTP_PORT)
@@ -1,11 +1,36 @@
-from fastapi import APIRouter, Depends, HTTPException, Body, Path, File, UploadFile
-from users.utils.response_util import success_response
-from users.models.domain import User, Role, Permission, MongoRef
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Body,
+    Path,
+    Query,
+    File,
+    Request,
+    UploadFile,
+)
+from users.utils.response_util import page_response, success_response
+from users.models.domain import (
+    User,
+    Role,
+    Permission,
+    Policy,
+    MongoRef,
+    UserBatchRequest,
+    UserGrants,
+    RoleGrants,
+)
 from users.services.user_service import user_service
 from users.services.role_service import role_service
 from users.services.permission_service import permission_service
+from users.services.policy_service import policy_service
+from users.services.service_credential_service import service_credential_service
 from users.utils.security import get_current_user, require_role
-from typing import List, Dict
+from users.utils.read_routing import read_from, read_only, record_writes
+from users.utils.idempotency import idempotency
+from users.utils.db import READ_SECONDARY_PREFERRED
+from users.config.config import config
+from typing import List, Dict, Optional
 from users.config.logging_config import get_logger
 import io
 import csv
@@ -13,7 +38,8 @@ from fastapi.responses import StreamingResponse
 
 log = get_logger(__name__)
 
-router = APIRouter()
+# Admins read their own writes even when listings come from secondaries
+router = APIRouter(dependencies=[record_writes()])
 
 
 def get_current_sub(token_data=Depends(get_current_user)):
@@ -23,42 +49,81 @@ def get_current_sub(token_data=Depends(get_current_user)):
 
 @router.post("/admins/create-user")
 async def create_auto_confirmed_user(
-    user: User, token_data=Depends(require_role("ROLE_ADMIN"))
+    request: Request, user: User, token_data=Depends(require_role("ROLE_ADMIN"))
 ):
     log.debug(f"create_auto_confirmed_user: {user}")
     created_by = token_data["sub"]
     tenant = token_data.get("tenantId", "")
-    return success_response(
-        await user_service.create_auto_confirmed_user(user, created_by, tenant),
-        "User created",
-    )
+
+    async def create():
+        return success_response(
+            await user_service.create_auto_confirmed_user(user, created_by, tenant),
+            "User created",
+        )
+
+    return await idempotency.run(request, created_by, create)
 
 
 @router.get("/admins/{id}")
-async def get_any_user(id: str, token_data=Depends(require_role("ROLE_ADMIN"))):
+async def get_any_user(
+    id: str,
+    fields: Optional[str] = Query(None, description="e.g. id,firstName,email"),
+    token_data=Depends(require_role("ROLE_ADMIN")),
+):
     log.debug(f"get_any_user: {id}")
-    u = await user_service.get_user(id)
+    u = await user_service.get_user(id, user_service.parse_fields(fields))
     if not u:
         raise HTTPException(404, "User not found")
     return success_response(u, "User details")
 
 
-@router.post("/admin/users/search")
+@router.post("/admin/users/search", dependencies=[read_only()])
 async def search_users(
-    query: Dict = Body(default={}), token_data=Depends(require_role("ROLE_ADMIN"))
+    query: Dict = Body(default={}),
+    fields: Optional[str] = Query(None, description="e.g. id,firstName,email"),
+    limit: Optional[int] = Query(None, ge=1, description="Page size"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the last page"),
+    token_data=Depends(require_role("ROLE_ADMIN")),
 ):
     log.debug(f"search_users: {query}")
     tenant = token_data.get("tenantId", "")
     query["tenantId"] = tenant
-    return success_response(await user_service.search_users(query), "Users found")
+    users, next_cursor = await user_service.search_users(
+        query, user_service.parse_fields(fields), limit, cursor
+    )
+    return page_response(users, next_cursor, "Users found")
+
+
+@router.post("/admin/users/batch", dependencies=[read_only()])
+async def get_users_batch(
+    batch: UserBatchRequest,
+    fields: Optional[str] = Query(None, description="e.g. id,firstName,email"),
+    token_data=Depends(require_role("ROLE_ADMIN")),
+):
+    """
+    Many users in one call: results follow the order of `ids` then `emails`,
+    each {"key", "found", "user"}; unknown keys come back with found=false.
+    """
+    log.debug(f"get_users_batch: {len(batch.ids)} ids, {len(batch.emails)} emails")
+    results = await user_service.get_users(
+        batch.ids, batch.emails, user_service.parse_fields(fields)
+    )
+    found = sum(1 for r in results if r["found"])
+    return success_response(results, f"{found} of {len(results)} users found")
 
 
 @router.post("/admin/user")
-async def invite_user(user: User, token_data=Depends(require_role("ROLE_ADMIN"))):
+async def invite_user(
+    request: Request, user: User, token_data=Depends(require_role("ROLE_ADMIN"))
+):
     log.debug(f"invite_user: {user}")
-    return success_response(
-        await user_service.invite_user(user, token_data["sub"]), "User invited"
-    )
+
+    async def invite():
+        return success_response(
+            await user_service.invite_user(user, token_data["sub"]), "User invited"
+        )
+
+    return await idempotency.run(request, token_data["sub"], invite)
 
 
 @router.post("/admin/users/bulk-invite")
@@ -143,6 +208,26 @@ async def remove_user_permission(
     return success_response(None, "Permission removed")
 
 
+@router.post("/admin/users/grants")
+async def grant_users(
+    grants: UserGrants, token_data=Depends(require_role("ROLE_ADMIN"))
+):
+    changed = await user_service.grant(
+        grants.userIds, grants.roleIds, grants.permissionIds, token_data["sub"]
+    )
+    return success_response({"modified": changed}, "Access granted")
+
+
+@router.delete("/admin/users/grants")
+async def revoke_users(
+    grants: UserGrants, token_data=Depends(require_role("ROLE_ADMIN"))
+):
+    changed = await user_service.revoke(
+        grants.userIds, grants.roleIds, grants.permissionIds, token_data["sub"]
+    )
+    return success_response({"modified": changed}, "Access revoked")
+
+
 @router.post("/admin/permission")
 async def create_permission(
     perm: Permission, token_data=Depends(require_role("ROLE_ADMIN"))
@@ -178,6 +263,36 @@ async def add_permission_to_role(
     return success_response(None, "Permission added to role")
 
 
+@router.post("/admin/roles/permissions")
+async def grant_role_permissions(
+    grants: RoleGrants, token_data=Depends(require_role("ROLE_ADMIN"))
+):
+    changed = await role_service.grant_permissions(
+        grants.roleIds, grants.permissionIds, token_data["sub"]
+    )
+    return success_response({"modified": changed}, "Permissions added to roles")
+
+
+@router.delete("/admin/roles/permissions")
+async def revoke_role_permissions(
+    grants: RoleGrants, token_data=Depends(require_role("ROLE_ADMIN"))
+):
+    changed = await role_service.revoke_permissions(
+        grants.roleIds, grants.permissionIds, token_data["sub"]
+    )
+    return success_response({"modified": changed}, "Permissions removed from roles")
+
+
+@router.put("/admin/role/parents")
+async def set_role_parents(
+    role_id: str = Body(...),
+    parentRoleIds: List[str] = Body(...),
+    token_data=Depends(require_role("ROLE_ADMIN")),
+):
+    await role_service.set_parent_roles(role_id, parentRoleIds, token_data["sub"])
+    return success_response(None, "Role parents updated")
+
+
 @router.delete("/admin/role")
 async def delete_role(
     role_id: str = Body(..., embed=True), token_data=Depends(require_role("ROLE_ADMIN"))
@@ -187,16 +302,97 @@ async def delete_role(
 
 
 @router.get("/admin/user/{id}")
-async def get_user_admin(id: str, token_data=Depends(require_role("ROLE_ADMIN"))):
-    return success_response(await user_service.get_user(id), "User details")
+async def get_user_admin(
+    id: str,
+    fields: Optional[str] = Query(None, description="e.g. id,firstName,email"),
+    token_data=Depends(require_role("ROLE_ADMIN")),
+):
+    return success_response(
+        await user_service.get_user(id, user_service.parse_fields(fields)),
+        "User details",
+    )
 
 
-@router.get("/admin/roles")
+@router.get("/admin/roles", dependencies=[read_from(READ_SECONDARY_PREFERRED)])
 async def get_roles(token_data=Depends(require_role("ROLE_ADMIN"))):
     # TODO remove super_admin from role list
     return success_response(await role_service.get_all_roles(), "Roles list")
 
 
-@router.get("/admin/permissions")
+@router.get("/admin/permissions", dependencies=[read_from(READ_SECONDARY_PREFERRED)])
 async def get_permissions(token_data=Depends(require_role("ROLE_ADMIN"))):
     return success_response(await permission_service.get_all(), "Permissions list")
+
+
+@router.post("/admin/policy")
+async def create_policy(policy: Policy, token_data=Depends(require_role("ROLE_ADMIN"))):
+    return success_response(
+        await policy_service.create_policy(policy, token_data["sub"]),
+        "Policy created",
+    )
+
+
+@router.get("/admin/policies", dependencies=[read_from(READ_SECONDARY_PREFERRED)])
+async def get_policies(token_data=Depends(require_role("ROLE_ADMIN"))):
+    return success_response(await policy_service.get_all(), "Policies list")
+
+
+@router.put("/admin/policy/{id}")
+async def update_policy(
+    id: str, data: Dict = Body(...), token_data=Depends(require_role("ROLE_ADMIN"))
+):
+    await policy_service.update_policy(id, data, token_data["sub"])
+    return success_response(None, "Policy updated")
+
+
+@router.delete("/admin/policy")
+async def delete_policy(
+    id: str = Body(..., embed=True), token_data=Depends(require_role("ROLE_ADMIN"))
+):
+    await policy_service.delete_policy(id, token_data["sub"])
+    return success_response(None, "Policy deleted")
+
+
+@router.post("/admin/service-credential")
+async def create_service_credential(
+    name: str = Body(...),
+    roles: List[str] = Body([]),
+    tenantId: Optional[str] = Body(None),
+    token_data=Depends(require_role("ROLE_ADMIN")),
+):
+    caller_roles = token_data.get("roles", [])
+    if config.CROSS_TENANT_ADMIN_ROLE not in caller_roles:
+        # A tenant admin only issues credentials for their own tenant, with
+        # roles they hold themselves
+        own_tenant = token_data.get("tenantId")
+        if tenantId is None:
+            tenantId = own_tenant
+        if not own_tenant or tenantId != own_tenant:
+            log.warning(
+                f"{token_data['sub']} denied a service credential for {tenantId}"
+            )
+            raise HTTPException(403, "Credential tenant must be your own")
+        if not set(roles) <= set(caller_roles):
+            raise HTTPException(403, "Credential roles must be roles you hold")
+    return success_response(
+        await service_credential_service.create_credential(
+            name, roles, tenantId, token_data["sub"]
+        ),
+        "Service credential created; the secret is shown only once",
+    )
+
+
+@router.get("/admin/service-credentials")
+async def get_service_credentials(token_data=Depends(require_role("ROLE_ADMIN"))):
+    return success_response(
+        await service_credential_service.get_all(), "Service credentials list"
+    )
+
+
+@router.delete("/admin/service-credential")
+async def disable_service_credential(
+    clientId: str = Body(..., embed=True),
+    token_data=Depends(require_role("ROLE_ADMIN")),
+):
+    await service_credential_service.disable_credential(clientId, token_data["sub"])
+    return success_response(None, "Service credential disabled")
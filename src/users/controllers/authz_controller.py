@@ -0,0 +1,56 @@
+from fastapi import APIRouter, Depends, HTTPException
+from users.utils.response_util import success_response
+from users.models.domain import AuthzCheckRequest
+from users.services.authorization_service import authorization_service
+from users.utils.service_auth import validate_token_or_service
+from users.config.config import config
+from users.config.logging_config import get_logger
+
+log = get_logger(__name__)
+
+router = APIRouter()
+
+
+@router.post("/authz/check")
+async def check_access(
+    request: AuthzCheckRequest,
+    token_data=Depends(validate_token_or_service),
+):
+    """
+    Answer a batch of "may subject do action (in tenant)?" questions in one
+    round trip.
+
+    Args:
+        request: List of {subject, action, tenantId} checks; action is a
+            permission name or id, tenantId is optional
+        token_data: JWT claims, or service-credential claims for signed calls.
+            Admins may ask about anyone and other users only about
+            themselves. A service credential issued for a tenant may only
+            ask about that tenant and its users
+
+    Returns:
+        One {subject, action, tenantId, allowed} entry per check, in order
+    """
+    if len(request.checks) > config.AUTHZ_CHECK_MAX_BATCH:
+        raise HTTPException(
+            400, f"At most {config.AUTHZ_CHECK_MAX_BATCH} checks per request"
+        )
+    if token_data.get("auth_type") != "service" and "ROLE_ADMIN" not in (
+        token_data.get("roles") or []
+    ):
+        sub = token_data.get("sub")
+        if any(check.subject != sub for check in request.checks):
+            log.warning(f"check_access: {sub} asked about other subjects")
+            raise HTTPException(403, "Insufficient privileges")
+    tenant_id = None
+    if token_data.get("auth_type") == "service" and token_data.get("tenantId"):
+        tenant_id = token_data["tenantId"]
+        if any(check.tenantId != tenant_id for check in request.checks):
+            log.warning(
+                f"check_access: {token_data.get('client_id')} asked outside "
+                f"tenant {tenant_id}"
+            )
+            raise HTTPException(403, "Credential not valid for tenant")
+    log.debug(f"check_access: {len(request.checks)} checks")
+    results = await authorization_service.check_batch(request.checks, tenant_id)
+    return success_response(results, "Authorization decisions")
@@ -1,37 +1,85 @@
-from fastapi import APIRouter, Depends, HTTPException, Path
-from users.utils.response_util import success_response
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request
+from users.utils.response_util import ndjson_response, page_response, wants_ndjson
 from users.models.domain import User
 from users.repositories.user_repository import user_repo
 from users.repositories.role_repository import role_repo
 from users.services.user_service import user_service
-from users.utils.security import validate_token
-from typing import List
+from users.utils.service_auth import validate_token_or_service
+from users.utils.read_routing import read_from
+from users.utils.db import READ_SECONDARY_PREFERRED
+from typing import List, Optional
 from users.config.logging_config import get_logger
 
 log = get_logger(__name__)
 
-router = APIRouter()
+
+def tenant_scope(
+    tenantId: str = Path(..., description="Tenant ID"),
+    token_data=Depends(validate_token_or_service),
+):
+    """Service credentials only read the tenant they were issued for."""
+    if token_data.get("auth_type") == "service" and (
+        token_data.get("tenantId") != tenantId
+    ):
+        log.warning(
+            f"Service client {token_data.get('client_id')} denied tenant {tenantId}"
+        )
+        raise HTTPException(status_code=403, detail="Credential not valid for tenant")
+
+
+# Read-only listings: served by secondaries, bounded by max staleness
+router = APIRouter(
+    dependencies=[
+        Depends(tenant_scope),
+        read_from(READ_SECONDARY_PREFERRED, auth=validate_token_or_service),
+    ]
+)
+
+
+def _stream(filter_query: dict, fields: Optional[str], token_data: dict):
+    return ndjson_response(
+        user_service.stream_users(
+            filter_query,
+            user_service.parse_fields(fields),
+            token_data.get("sub"),
+            READ_SECONDARY_PREFERRED,
+        )
+    )
 
 
 @router.get("/hierarchy/tenant/{tenantId}/users/{role_type}")
 async def get_users_by_role(
+    request: Request,
     tenantId: str = Path(..., description="Tenant ID"),
     role_type: str = Path(
         ..., description="Role type (e.g., ROLE_ANNOTATOR, ROLE_REVIEWER)"
     ),
-    token_data=Depends(validate_token),
+    fields: Optional[str] = Query(
+        None, description="Only these fields, e.g. id,firstName,lastName"
+    ),
+    limit: Optional[int] = Query(None, ge=1, description="Page size"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the last page"),
+    stream: bool = Query(False, description="All users as NDJSON, unpaged"),
+    token_data=Depends(validate_token_or_service),
 ):
     """
     Get all active and confirmed users who have a specific role type.
     This is a multi-tenant implementation.
 
     Args:
+        request: The request, for its Accept header
         tenantId: The tenant ID to filter users
         role_type: The role type to filter users (e.g., ROLE_ANNOTATOR, ROLE_REVIEWER)
-        token_data: JWT token data from authentication
+        fields: Comma-separated fields to return; default is the full user
+        limit: Page size, capped at PAGE_SIZE_MAX
+        cursor: next_cursor from the previous page
+        stream: Stream every match as NDJSON (also Accept: application/x-ndjson);
+            limit and cursor are ignored
+        token_data: JWT claims, or service-credential claims for signed calls
 
     Returns:
-        List of users matching the criteria
+        One page of users matching the criteria, with next_cursor, or the
+        NDJSON stream
     """
     log.info(f"Fetching users for tenant: {tenantId}, role: {role_type}")
 
@@ -51,31 +99,47 @@ async def get_users_by_role(
     }
 
     log.debug(f"Filter query: {filter_query}")
-    users = await user_service.search_users(filter_query)
-
-    # Fetch users matching the criteria
-    # users = await user_repo.get_all(filter_query=filter_query, limit=1000)
+    if wants_ndjson(request, stream):
+        log.info(f"Streaming users for tenant {tenantId}")
+        return _stream(filter_query, fields, token_data)
+    users, next_cursor = await user_service.search_users(
+        filter_query, user_service.parse_fields(fields), limit, cursor
+    )
 
     log.info(f"Found {len(users)} users for tenant {tenantId} with role {role_type}")
 
-    return success_response(users, "Users fetched successfully")
+    return page_response(users, next_cursor, "Users fetched successfully")
 
 
 @router.get("/hierarchy/tenant/{tenantId}/users")
 async def get_all_active_users(
+    request: Request,
     tenantId: str = Path(..., description="Tenant ID"),
-    token_data=Depends(validate_token),
+    fields: Optional[str] = Query(
+        None, description="Only these fields, e.g. id,firstName,lastName"
+    ),
+    limit: Optional[int] = Query(None, ge=1, description="Page size"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the last page"),
+    stream: bool = Query(False, description="All users as NDJSON, unpaged"),
+    token_data=Depends(validate_token_or_service),
 ):
     """
     Get all active users in the tenant, regardless of their role.
     This is a multi-tenant implementation.
 
     Args:
+        request: The request, for its Accept header
         tenantId: The tenant ID to filter users
-        token_data: JWT token data from authentication
+        fields: Comma-separated fields to return; default is the full user
+        limit: Page size, capped at PAGE_SIZE_MAX
+        cursor: next_cursor from the previous page
+        stream: Stream every match as NDJSON (also Accept: application/x-ndjson);
+            limit and cursor are ignored
+        token_data: JWT claims, or service-credential claims for signed calls
 
     Returns:
-        List of all active users in the tenant
+        One page of active users in the tenant, with next_cursor, or the
+        NDJSON stream
     """
     log.info(f"Fetching all active users for tenant: {tenantId}")
 
@@ -87,11 +151,13 @@ async def get_all_active_users(
     }
 
     log.debug(f"Filter query: {filter_query}")
-    users = await user_service.search_users(filter_query)
-
-    # Fetch users matching the criteria
-    # users = await user_repo.get_all(filter_query=filter_query, limit=1000)
+    if wants_ndjson(request, stream):
+        log.info(f"Streaming users for tenant {tenantId}")
+        return _stream(filter_query, fields, token_data)
+    users, next_cursor = await user_service.search_users(
+        filter_query, user_service.parse_fields(fields), limit, cursor
+    )
 
     log.info(f"Found {len(users)} active users for tenant {tenantId}")
 
-    return success_response(users, "Active users fetched successfully")
+    return page_response(users, next_cursor, "Active users fetched successfully")
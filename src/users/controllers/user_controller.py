@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, Body
+from fastapi import APIRouter, Depends, HTTPException, Body, Request
 from users.utils.response_util import success_response
 from users.models.domain import User
 from users.services.user_service import user_service
@@ -6,6 +6,7 @@ from users.services.otp_service import generate_otp, verify_otp
 from users.services.email_service import send_otp_email
 from users.repositories.user_repository import user_repo
 from users.utils.security import get_current_user
+from users.utils.idempotency import idempotency
 from typing import Dict
 from users.config.logging_config import get_logger
 
@@ -15,15 +16,19 @@ router = APIRouter()
 
 
 @router.post("/user/register")
-async def register(payload: Dict = Body(...)):
-    result = await user_service.register_user_self(
-        email=payload["email"],
-        password=payload["password"],
-        first_name=payload.get("firstName", ""),
-        last_name=payload.get("lastName", ""),
-        tenant=payload.get("tenantId", "default"),
-    )
-    return success_response(result, "User registered successfully")
+async def register(request: Request, payload: Dict = Body(...)):
+    async def register_once():
+        result = await user_service.register_user_self(
+            email=payload["email"],
+            password=payload["password"],
+            first_name=payload.get("firstName", ""),
+            last_name=payload.get("lastName", ""),
+            tenant=payload.get("tenantId", "default"),
+        )
+        return success_response(result, "User registered successfully")
+
+    # Anonymous: keys are only told apart by the request itself
+    return await idempotency.run(request, None, register_once)
 
 
 @router.put("/user/confirm")
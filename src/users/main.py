@@ -1,4 +1,4 @@
-from users.utils.security import jwks_cache
+from users.utils.security import jwks_cache, validator
 from users.config.logging_config import setup_logging, get_logger
 
 setup_logging()
@@ -6,9 +6,20 @@ log = get_logger(__name__)
 
 from fastapi import FastAPI
 from users.config.config import config
-from users.utils.db import db
+from users.utils.db import db, READ_PRIMARY
+from users.repositories.indexes import ensure_indexes
 from users.utils.redis_client import redis_client
-from users.controllers import admin_controller, user_controller, hierarchy_controller
+from users.utils.events import event_listener
+from users.services.authorization_service import authorization_service
+from users.services.policy_service import policy_service
+from users.utils.service_auth import service_authenticator
+from users.utils.idempotency import idempotency
+from users.controllers import (
+    admin_controller,
+    authz_controller,
+    hierarchy_controller,
+    user_controller,
+)
 import sys
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -20,19 +31,26 @@ async def startup_event():
     log.info("Starting up User Management Service")
     db.connect()
     try:
-        from users.repositories.user_repository import user_repo
-
-        await user_repo.ensure_indexes()
-        # jwks_cache.start_jwks_refresh()
+        await db.warm_up()
     except Exception as e:
-        log.error(f"Index creation failed: {e}")
+        log.error(f"MongoDB warm-up failed: {e}")
+    await ensure_indexes(db.get_db(READ_PRIMARY))
 
+    await jwks_cache.start()
     await redis_client.connect()
+    await authorization_service.start()
+    await policy_service.start()
+    service_authenticator.start()
+    event_listener.start()
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     log.info("Shutting down User Management Service")
+    await event_listener.stop()
+    await authorization_service.stop()
+    await jwks_cache.close()
+    validator.close()
     db.close()
     await redis_client.close()
 
@@ -50,6 +68,7 @@ app.add_middleware(
 app.include_router(admin_controller.router, tags=["Admin"])
 app.include_router(user_controller.router, tags=["User"])
 app.include_router(hierarchy_controller.router, tags=["Hierarchy"])
+app.include_router(authz_controller.router, tags=["Authz"])
 
 
 @app.get("/health")
@@ -57,6 +76,19 @@ def health_check():
     return {"status": "ok", "service": config.SERVICE_NAME}
 
 
+@app.get("/metrics")
+def metrics():
+    return {
+        "service": config.SERVICE_NAME,
+        "mongo": db.stats(),
+        "auth": validator.stats(),
+        "authz": authorization_service.stats(),
+        "policies": policy_service.stats(),
+        "service_auth": service_authenticator.stats(),
+        "idempotency": idempotency.stats(),
+    }
+
+
 if __name__ == "__main__":
     import uvicorn
 
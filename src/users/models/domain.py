@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, EmailStr, BeforeValidator, ConfigDict
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Literal
 from datetime import datetime
 from typing_extensions import Annotated
 
@@ -36,6 +36,7 @@ class Role(BaseModel):
     description: Optional[str] = None
     isDefault: bool = False
     permissionIds: List[str] = []
+    parentRoleIds: List[str] = []  # roles whose permissions this role inherits
     createdAt: datetime = Field(default_factory=datetime.utcnow)
     updatedAt: datetime = Field(default_factory=datetime.utcnow)
 
@@ -78,3 +79,62 @@ class AuditLog(BaseModel):
     timestamp: datetime = Field(default_factory=datetime.utcnow)
     performed_by: str
     details: Dict[str, Any] = {}
+
+
+class AuthzCheck(BaseModel):
+    subject: str  # user id
+    action: str  # permission name or id
+    tenantId: Optional[str] = None
+
+
+class AuthzCheckRequest(BaseModel):
+    checks: List[AuthzCheck]
+
+
+class UserBatchRequest(BaseModel):
+    ids: List[str] = []
+    emails: List[str] = []
+
+
+class UserGrants(BaseModel):
+    userIds: List[str]
+    roleIds: List[str] = []
+    permissionIds: List[str] = []
+
+
+class RoleGrants(BaseModel):
+    roleIds: List[str]
+    permissionIds: List[str]
+
+
+class Policy(BaseModel):
+    id: PyObjectId = Field(alias="_id", default=None)
+    name: str
+    description: Optional[str] = None
+    # Actions this policy governs; "*" applies it to every action
+    actions: List[str] = ["*"]
+    effect: Literal["allow", "deny"] = "allow"
+    # e.g. "attributes.department == resource.department"
+    condition: str
+    enabled: bool = True
+    version: int = 1
+    createdAt: datetime = Field(default_factory=datetime.utcnow)
+    updatedAt: datetime = Field(default_factory=datetime.utcnow)
+
+    model_config = ConfigDict(populate_by_name=True, arbitrary_types_allowed=True)
+
+
+class ServiceCredential(BaseModel):
+    id: PyObjectId = Field(alias="_id", default=None)
+    clientId: str
+    name: str
+    # SHA-256 of the issued secret; callers sign with this derived key
+    signingKey: Optional[str] = None
+    roles: List[str] = []
+    tenantId: Optional[str] = None
+    enabled: bool = True
+    createdBy: Optional[str] = None
+    createdAt: datetime = Field(default_factory=datetime.utcnow)
+    updatedAt: datetime = Field(default_factory=datetime.utcnow)
+
+    model_config = ConfigDict(populate_by_name=True, arbitrary_types_allowed=True)
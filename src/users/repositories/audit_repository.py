@@ -1,6 +1,7 @@
 from users.utils.db import db
 from users.models.domain import AuditLog
 from datetime import datetime
+from typing import List
 from users.config.logging_config import get_logger
 
 log = get_logger(__name__)
@@ -30,5 +31,31 @@ class AuditRepository:
         except Exception as e:
             logger.error(f"Failed to write audit log: {e}")
 
+    async def log_events(
+        self,
+        action: str,
+        target_collection: str,
+        target_ids: List[str],
+        performed_by: str,
+        details: dict = None,
+    ):
+        """One audit entry per target, written in a single insert."""
+        if not target_ids:
+            return
+        try:
+            entries = [
+                AuditLog(
+                    action=action,
+                    target_collection=target_collection,
+                    target_id=str(target_id),
+                    performed_by=performed_by,
+                    details=details or {},
+                ).model_dump()
+                for target_id in target_ids
+            ]
+            await db.get_db()[self.collection_name].insert_many(entries, ordered=False)
+        except Exception as e:
+            log.error(f"Failed to write audit logs: {e}")
+
 
 audit_repo = AuditRepository()
@@ -0,0 +1,179 @@
+"""
+Chunked, unordered bulk writes shared by the repositories.
+
+A list of pymongo write operations is sent as bulk_write(ordered=False)
+batches of BULK_WRITE_CHUNK_SIZE, so thousands of writes cost a handful of
+round trips. The server applies every operation it can; failures come back
+per item, with their position in the caller's list, so a CSV import can
+report "row 17: duplicate email" and still keep rows 1-16 and 18-1000.
+"""
+
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
+from bson import ObjectId
+from pydantic import BaseModel
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from datetime import datetime
+from users.config.config import config
+from users.config.logging_config import get_logger
+
+log = get_logger(__name__)
+
+DUPLICATE_KEY = 11000
+
+
+class BulkItemResult(BaseModel):
+    index: int  # position in the caller's input
+    ok: bool
+    id: Optional[str] = None
+    error: Optional[str] = None  # "duplicate_key", "invalid_id" or server message
+    key: Optional[Dict[str, Any]] = None  # conflicting key for duplicate_key
+
+
+class BulkResult(BaseModel):
+    items: List[BulkItemResult] = []
+    inserted: int = 0
+    matched: int = 0
+    modified: int = 0
+    deleted: int = 0
+    upserted: int = 0
+
+    @property
+    def failed(self) -> List[BulkItemResult]:
+        return [item for item in self.items if not item.ok]
+
+
+def _error_item(index: int, error: dict) -> BulkItemResult:
+    if error.get("code") == DUPLICATE_KEY:
+        return BulkItemResult(
+            index=index, ok=False, error="duplicate_key", key=error.get("keyValue")
+        )
+    return BulkItemResult(index=index, ok=False, error=error.get("errmsg"))
+
+
+async def bulk_apply(
+    collection,
+    ops: Sequence,
+    ids: Optional[Sequence[Optional[str]]] = None,
+    chunk_size: Optional[int] = None,
+) -> BulkResult:
+    """
+    Run `ops` unordered in chunks; one BulkItemResult per op, in input order.
+    An op succeeds unless the server reported a write error for it (an
+    update that matched nothing is still ok; see the matched counter).
+    `ids`, parallel to `ops`, names the document each op writes; it is what
+    the results report as their id.
+    """
+    chunk_size = chunk_size or config.BULK_WRITE_CHUNK_SIZE
+    result = BulkResult()
+    for start in range(0, len(ops), chunk_size):
+        chunk = ops[start : start + chunk_size]
+        errors = {}
+        try:
+            counts = (await collection.bulk_write(chunk, ordered=False)).bulk_api_result
+        except BulkWriteError as e:
+            counts = e.details
+            errors = {err["index"]: err for err in counts.get("writeErrors", [])}
+            log.warning(
+                f"bulk_write on {collection.name}: {len(errors)} of {len(chunk)} "
+                "operations failed"
+            )
+        result.inserted += counts.get("nInserted", 0)
+        result.matched += counts.get("nMatched", 0)
+        result.modified += counts.get("nModified", 0)
+        result.deleted += counts.get("nRemoved", 0)
+        result.upserted += counts.get("nUpserted", 0)
+        for offset in range(len(chunk)):
+            if offset in errors:
+                result.items.append(_error_item(start + offset, errors[offset]))
+            else:
+                result.items.append(
+                    BulkItemResult(
+                        index=start + offset,
+                        ok=True,
+                        id=ids[start + offset] if ids is not None else None,
+                    )
+                )
+    return result
+
+
+def insert_ops(docs: List[dict]) -> Tuple[List[InsertOne], List[str]]:
+    """
+    InsertOne per document and the matching ids for bulk_apply; _id is
+    assigned here so the results can carry it.
+    """
+    for doc in docs:
+        doc.setdefault("_id", ObjectId())
+    return [InsertOne(doc) for doc in docs], [str(doc["_id"]) for doc in docs]
+
+
+async def update_by_ids(
+    collection, ids: List[str], data: dict, chunk_size: Optional[int] = None
+) -> BulkResult:
+    """$set `data` (plus updatedAt) on each id; malformed ids fail as invalid_id."""
+    to_set = {**data, "updatedAt": datetime.utcnow()}
+    valid = [i for i, _id in enumerate(ids) if ObjectId.is_valid(_id)]
+    applied = await bulk_apply(
+        collection,
+        [UpdateOne({"_id": ObjectId(ids[i])}, {"$set": to_set}) for i in valid],
+        ids=[ids[i] for i in valid],
+        chunk_size=chunk_size,
+    )
+    # Re-number results to positions in `ids` and slot in the invalid ones
+    items = [
+        BulkItemResult(index=i, ok=False, id=_id, error="invalid_id")
+        for i, _id in enumerate(ids)
+    ]
+    for item in applied.items:
+        items[valid[item.index]] = item.model_copy(update={"index": valid[item.index]})
+    applied.items = items
+    return applied
+
+
+def _grant_lists(values: Dict[str, List[str]]) -> Dict[str, List[str]]:
+    return {field: list(dict.fromkeys(v)) for field, v in values.items() if v}
+
+
+async def add_to_set_by_ids(
+    collection, ids: List[str], values: Dict[str, List[str]]
+) -> int:
+    """
+    Atomically add `values` (field -> items) to array fields of many
+    documents in one update_many; returns how many documents changed.
+    Documents that already hold everything are not touched, so updatedAt
+    only moves on a real change. Concurrent grants never overwrite each other.
+    """
+    values = _grant_lists(values)
+    oids = [ObjectId(i) for i in ids if ObjectId.is_valid(i)]
+    if not values or not oids:
+        return 0
+    res = await collection.update_many(
+        {
+            "_id": {"$in": oids},
+            "$or": [{field: {"$not": {"$all": v}}} for field, v in values.items()],
+        },
+        {
+            "$addToSet": {field: {"$each": v} for field, v in values.items()},
+            "$set": {"updatedAt": datetime.utcnow()},
+        },
+    )
+    return res.modified_count
+
+
+async def pull_by_ids(collection, ids: List[str], values: Dict[str, List[str]]) -> int:
+    """Inverse of add_to_set_by_ids: atomically $pull items from many documents."""
+    values = _grant_lists(values)
+    oids = [ObjectId(i) for i in ids if ObjectId.is_valid(i)]
+    if not values or not oids:
+        return 0
+    res = await collection.update_many(
+        {
+            "_id": {"$in": oids},
+            "$or": [{field: {"$in": v}} for field, v in values.items()],
+        },
+        {
+            "$pull": {field: {"$in": v} for field, v in values.items()},
+            "$set": {"updatedAt": datetime.utcnow()},
+        },
+    )
+    return res.modified_count
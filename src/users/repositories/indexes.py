@@ -0,0 +1,168 @@
+"""
+Every index the service relies on, and every query shape that must use one.
+
+Indexes are declared here per collection instead of in each repository so
+that startup, the explain check and reviewers all look at one list. When a
+repository gains a query, register its shape in QUERY_SHAPES; the check
+(scripts/check_indexes.py, tests/functional/test_indexes.py) runs explain()
+for each shape against a real mongod and fails on any COLLSCAN.
+"""
+
+from pymongo import ASCENDING, IndexModel
+from bson import ObjectId
+from typing import Dict, List, NamedTuple, Optional
+from users.repositories.user_repository import PAGE_SORT
+from users.config.logging_config import get_logger
+
+log = get_logger(__name__)
+
+DELETED_USER_RETENTION_SECONDS = 7776000  # 90 days
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    "users": [
+        IndexModel([("email", ASCENDING)], unique=True),
+        # Listing order and keyset cursors for a tenant
+        IndexModel(PAGE_SORT),
+        # Role pickers; soft-deleted users are always disabled, so the partial
+        # filter also keeps them out ($exists: false is not allowed here)
+        IndexModel(
+            [("tenantId", ASCENDING), ("roleIds", ASCENDING)] + PAGE_SORT[1:],
+            partialFilterExpression={"enabled": True},
+        ),
+        # Name search: one exact nameTokens match, then listing order
+        IndexModel(
+            [("tenantId", ASCENDING), ("nameTokens", ASCENDING)] + PAGE_SORT[1:]
+        ),
+        IndexModel([("roleIds", ASCENDING)]),
+        IndexModel([("permissionIds", ASCENDING)]),
+        IndexModel(
+            [("deletedAt", ASCENDING)],
+            expireAfterSeconds=DELETED_USER_RETENTION_SECONDS,
+        ),
+    ],
+    "roles": [
+        IndexModel([("name", ASCENDING)]),
+        IndexModel([("parentRoleIds", ASCENDING)]),
+    ],
+    "service_credentials": [
+        IndexModel([("clientId", ASCENDING)], unique=True),
+    ],
+}
+
+
+class QueryShape(NamedTuple):
+    name: str
+    collection: str
+    filter: dict
+    sort: Optional[list] = None
+
+
+_ID = ObjectId()
+
+# Representative filters for each repository query; values are placeholders,
+# only the shape matters to the planner. Whole-collection reads (roles,
+# permissions and policies get_all) are intentionally not listed.
+QUERY_SHAPES: List[QueryShape] = [
+    QueryShape("users.by_email", "users", {"email": "a@example.com"}),
+    QueryShape("users.by_ids", "users", {"_id": {"$in": [_ID]}}),
+    QueryShape(
+        "users.by_ids_or_emails",
+        "users",
+        {"$or": [{"_id": {"$in": [_ID]}}, {"email": {"$in": ["a@example.com"]}}]},
+    ),
+    QueryShape(
+        "users.hierarchy_by_role",
+        "users",
+        {
+            "tenantId": "t",
+            "enabled": True,
+            "confirmed": True,
+            "roleIds": {"$in": ["r"]},
+            "deletedAt": {"$exists": False},
+        },
+        PAGE_SORT,
+    ),
+    QueryShape(
+        "users.hierarchy_active",
+        "users",
+        {"tenantId": "t", "enabled": True, "deletedAt": {"$exists": False}},
+        PAGE_SORT,
+    ),
+    QueryShape(
+        "users.search_by_name",
+        "users",
+        {
+            "nameTokens": {"$all": ["ann", "lind"]},
+            "tenantId": "t",
+            "deletedAt": {"$exists": False},
+        },
+        PAGE_SORT,
+    ),
+    QueryShape(
+        "users.page_after",
+        "users",
+        {
+            "$and": [
+                {"tenantId": "t", "deletedAt": {"$exists": False}},
+                {
+                    "$or": [
+                        {"tenantId": {"$gt": "t"}},
+                        {"tenantId": "t", "lastName": {"$gt": "l"}},
+                        {"tenantId": "t", "lastName": "l", "_id": {"$gt": _ID}},
+                    ]
+                },
+            ]
+        },
+        PAGE_SORT,
+    ),
+    QueryShape("roles.by_name", "roles", {"name": "ROLE_ADMIN"}),
+    QueryShape("roles.by_ids", "roles", {"_id": {"$in": [_ID]}}),
+    QueryShape("roles.children", "roles", {"parentRoleIds": str(_ID)}),
+    QueryShape(
+        "service_credentials.by_client_id", "service_credentials", {"clientId": "c"}
+    ),
+]
+
+
+async def ensure_indexes(database):
+    """
+    Create every registered index (Motor database); existing ones are no-ops.
+    A conflict on one collection is logged and does not stop the others.
+    """
+    for collection, models in INDEXES.items():
+        try:
+            await database[collection].create_indexes(models)
+            log.info(f"Indexes ensured on {collection}: {len(models)}")
+        except Exception as e:
+            log.error(f"Index creation failed on {collection}: {e}")
+
+
+def _has_stage(plan, stage: str) -> bool:
+    if isinstance(plan, dict):
+        if plan.get("stage") == stage:
+            return True
+        return any(_has_stage(v, stage) for v in plan.values())
+    if isinstance(plan, list):
+        return any(_has_stage(v, stage) for v in plan)
+    return False
+
+
+def find_collscans(database) -> List[str]:
+    """
+    Create the registered indexes on a (pymongo, synchronous) database and
+    explain every query shape; return the names of shapes whose winning plan
+    still scans a whole collection.
+    """
+    for collection, models in INDEXES.items():
+        database[collection].create_indexes(models)
+
+    failures = []
+    for shape in QUERY_SHAPES:
+        cursor = database[shape.collection].find(shape.filter)
+        if shape.sort:
+            cursor = cursor.sort(shape.sort)
+        plan = cursor.explain()["queryPlanner"]["winningPlan"]
+        if _has_stage(plan, "COLLSCAN"):
+            log.error(f"Query shape {shape.name} does a COLLSCAN: {plan}")
+            failures.append(shape.name)
+    return failures
@@ -1,5 +1,6 @@
 from users.utils.db import db
 from users.models.domain import Permission
+from users.repositories.bulk import BulkResult, bulk_apply, insert_ops, update_by_ids
 from bson import ObjectId
 from typing import List, Optional
 from users.config.logging_config import get_logger
@@ -11,8 +12,8 @@ class PermissionRepository:
     def __init__(self):
         self.collection_name = "permissions"
 
-    def collection(self):
-        return db.get_db()[self.collection_name]
+    def collection(self, intent: Optional[str] = None):
+        return db.get_db(intent)[self.collection_name]
 
     async def create(self, perm: Permission) -> Permission:
         data = perm.model_dump(by_alias=True, exclude={"id"})
@@ -20,8 +21,28 @@ class PermissionRepository:
         perm.id = str(result.inserted_id)
         return perm
 
-    async def get_all(self) -> List[Permission]:
-        cursor = self.collection().find()
+    async def create_many(self, permissions: List[Permission]) -> BulkResult:
+        """Unordered batched insert; inserted items get their id set."""
+        docs = [p.model_dump(by_alias=True, exclude={"id"}) for p in permissions]
+        ops, ids = insert_ops(docs)
+        result = await bulk_apply(self.collection(), ops, ids)
+        for item in result.items:
+            if item.ok:
+                permissions[item.index].id = item.id
+        return result
+
+    async def update_many_by_ids(
+        self, permission_ids: List[str], data: dict
+    ) -> BulkResult:
+        return await update_by_ids(self.collection(), permission_ids, data)
+
+    async def bulk_apply(
+        self, ops: list, ids: Optional[List[Optional[str]]] = None
+    ) -> BulkResult:
+        return await bulk_apply(self.collection(), ops, ids)
+
+    async def get_all(self, intent: Optional[str] = None) -> List[Permission]:
+        cursor = self.collection(intent).find(session=db.session(intent))
         perms = []
         async for doc in cursor:
             doc["_id"] = str(doc["_id"])
@@ -0,0 +1,58 @@
+from users.utils.db import db
+from users.models.domain import Policy
+from bson import ObjectId
+from typing import List, Optional
+from datetime import datetime
+from users.config.logging_config import get_logger
+
+log = get_logger(__name__)
+
+
+class PolicyRepository:
+    def __init__(self):
+        self.collection_name = "policies"
+
+    def collection(self, intent: Optional[str] = None):
+        return db.get_db(intent)[self.collection_name]
+
+    async def create(self, policy: Policy) -> Policy:
+        data = policy.model_dump(by_alias=True, exclude={"id"})
+        result = await self.collection().insert_one(data)
+        policy.id = str(result.inserted_id)
+        return policy
+
+    async def get_by_id(self, policy_id: str) -> Optional[Policy]:
+        if not ObjectId.is_valid(policy_id):
+            return None
+        doc = await self.collection().find_one({"_id": ObjectId(policy_id)})
+        if not doc:
+            return None
+        doc["_id"] = str(doc["_id"])
+        return Policy.model_validate(doc)
+
+    async def get_all(self, intent: Optional[str] = None) -> List[Policy]:
+        cursor = self.collection(intent).find(session=db.session(intent))
+        policies = []
+        async for doc in cursor:
+            doc["_id"] = str(doc["_id"])
+            policies.append(Policy.model_validate(doc))
+        return policies
+
+    async def update(self, policy_id: str, data: dict) -> bool:
+        """Apply changes and bump the version so compiled copies are replaced."""
+        if not ObjectId.is_valid(policy_id):
+            return False
+        data["updatedAt"] = datetime.utcnow()
+        res = await self.collection().update_one(
+            {"_id": ObjectId(policy_id)}, {"$set": data, "$inc": {"version": 1}}
+        )
+        return res.modified_count > 0
+
+    async def delete(self, policy_id: str) -> bool:
+        if not ObjectId.is_valid(policy_id):
+            return False
+        res = await self.collection().delete_one({"_id": ObjectId(policy_id)})
+        return res.deleted_count > 0
+
+
+policy_repo = PolicyRepository()
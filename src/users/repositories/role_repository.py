@@ -1,5 +1,13 @@
-from users.utils.db import db
+from users.utils.db import db, READ_PRIMARY
 from users.models.domain import Role
+from users.repositories.bulk import (
+    BulkResult,
+    add_to_set_by_ids,
+    bulk_apply,
+    insert_ops,
+    pull_by_ids,
+    update_by_ids,
+)
 from bson import ObjectId
 from typing import List, Optional
 from datetime import datetime
@@ -12,8 +20,8 @@ class RoleRepository:
     def __init__(self):
         self.collection_name = "roles"
 
-    def collection(self):
-        return db.get_db()[self.collection_name]
+    def collection(self, intent: Optional[str] = None):
+        return db.get_db(intent)[self.collection_name]
 
     async def create(self, role: Role) -> Role:
         data = role.model_dump(by_alias=True, exclude={"id"})
@@ -21,6 +29,40 @@ class RoleRepository:
         role.id = str(result.inserted_id)
         return role
 
+    async def create_many(self, roles: List[Role]) -> BulkResult:
+        """Unordered batched insert; inserted items get their id set."""
+        docs = [role.model_dump(by_alias=True, exclude={"id"}) for role in roles]
+        ops, ids = insert_ops(docs)
+        result = await bulk_apply(self.collection(), ops, ids)
+        for item in result.items:
+            if item.ok:
+                roles[item.index].id = item.id
+        return result
+
+    async def update_many_by_ids(self, role_ids: List[str], data: dict) -> BulkResult:
+        return await update_by_ids(self.collection(), role_ids, data)
+
+    async def grant_permissions(
+        self, role_ids: List[str], permission_ids: List[str]
+    ) -> int:
+        """Atomically add permissions to roles; returns roles changed."""
+        return await add_to_set_by_ids(
+            self.collection(), role_ids, {"permissionIds": permission_ids}
+        )
+
+    async def revoke_permissions(
+        self, role_ids: List[str], permission_ids: List[str]
+    ) -> int:
+        """Atomically remove permissions from roles; returns roles changed."""
+        return await pull_by_ids(
+            self.collection(), role_ids, {"permissionIds": permission_ids}
+        )
+
+    async def bulk_apply(
+        self, ops: list, ids: Optional[List[Optional[str]]] = None
+    ) -> BulkResult:
+        return await bulk_apply(self.collection(), ops, ids)
+
     async def get_by_id(self, role_id: str) -> Optional[Role]:
         if not ObjectId.is_valid(role_id):
             return None
@@ -30,15 +72,32 @@ class RoleRepository:
         doc["_id"] = str(doc["_id"])
         return Role.model_validate(doc)
 
-    async def get_by_name(self, name: str) -> Optional[Role]:
-        doc = await self.collection().find_one({"name": name})
+    async def get_by_name(
+        self, name: str, intent: Optional[str] = None
+    ) -> Optional[Role]:
+        doc = await self.collection(intent).find_one(
+            {"name": name}, session=db.session(intent)
+        )
         if not doc:
             return None
         doc["_id"] = str(doc["_id"])
         return Role.model_validate(doc)
 
-    async def get_all(self) -> List[Role]:
-        cursor = self.collection().find()
+    async def get_by_ids(self, role_ids: List[str]) -> List[Role]:
+        oids = [ObjectId(r) for r in role_ids if ObjectId.is_valid(r)]
+        # Feeds authorization decisions, so never from a lagging secondary
+        cursor = self.collection(READ_PRIMARY).find({"_id": {"$in": oids}})
+        roles = []
+        async for doc in cursor:
+            doc["_id"] = str(doc["_id"])
+            roles.append(Role.model_validate(doc))
+        return roles
+
+    async def count_children(self, role_id: str) -> int:
+        return await self.collection().count_documents({"parentRoleIds": role_id})
+
+    async def get_all(self, intent: Optional[str] = None) -> List[Role]:
+        cursor = self.collection(intent).find(session=db.session(intent))
         roles = []
         async for doc in cursor:
             doc["_id"] = str(doc["_id"])
@@ -0,0 +1,46 @@
+from users.utils.db import db
+from users.models.domain import ServiceCredential
+from typing import List, Optional
+from datetime import datetime
+from users.config.logging_config import get_logger
+
+log = get_logger(__name__)
+
+
+class ServiceCredentialRepository:
+    def __init__(self):
+        self.collection_name = "service_credentials"
+
+    def collection(self):
+        return db.get_db()[self.collection_name]
+
+    async def create(self, credential: ServiceCredential) -> ServiceCredential:
+        data = credential.model_dump(by_alias=True, exclude={"id"})
+        result = await self.collection().insert_one(data)
+        credential.id = str(result.inserted_id)
+        return credential
+
+    async def get_by_client_id(self, client_id: str) -> Optional[ServiceCredential]:
+        doc = await self.collection().find_one({"clientId": client_id})
+        if not doc:
+            return None
+        doc["_id"] = str(doc["_id"])
+        return ServiceCredential.model_validate(doc)
+
+    async def get_all(self) -> List[ServiceCredential]:
+        cursor = self.collection().find({}, {"signingKey": 0})
+        credentials = []
+        async for doc in cursor:
+            doc["_id"] = str(doc["_id"])
+            credentials.append(ServiceCredential.model_validate(doc))
+        return credentials
+
+    async def set_enabled(self, client_id: str, enabled: bool) -> bool:
+        res = await self.collection().update_one(
+            {"clientId": client_id},
+            {"$set": {"enabled": enabled, "updatedAt": datetime.utcnow()}},
+        )
+        return res.matched_count > 0
+
+
+service_credential_repo = ServiceCredentialRepository()
@@ -1,35 +1,205 @@
-from users.utils.db import db
+from users.utils.db import db, READ_PRIMARY
+from users.config.config import config
 from users.models.domain import User
+from users.utils.name_search import name_tokens
+from users.utils.serializers import compile_serializer, json_value
+from users.repositories.bulk import (
+    BulkResult,
+    add_to_set_by_ids,
+    bulk_apply,
+    insert_ops,
+    pull_by_ids,
+    update_by_ids,
+)
 from datetime import datetime
 from bson import ObjectId
-from typing import List, Optional
+from pymongo import ReturnDocument
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Union
+import base64
+import json
 from users.config.logging_config import get_logger
 
 log = get_logger(__name__)
 
+# Top-level fields a caller may select with fields=; never the password hash
+PROJECTABLE_FIELDS = (frozenset(User.model_fields) - {"id", "password"}) | {"_id"}
+DEFAULT_PROJECTION = {"password": 0, "nameTokens": 0}
+# Never read back into a diff; a change is reported as REDACTED_CHANGE
+SECRET_FIELDS = frozenset({"password"})
+REDACTED_CHANGE = "<changed>"
+
+# Listings return what we stored ourselves; skip model validation for them
+serialize_user = compile_serializer(User, exclude={"password"})
+
+
+def build_projection(fields: Optional[List[str]]) -> dict:
+    """Mongo projection for a sparse fieldset, or the default without password."""
+    if not fields:
+        return DEFAULT_PROJECTION
+    projection = {field: 1 for field in fields}
+    if "_id" not in projection:
+        projection["_id"] = 0
+    return projection
+
+
+# Listing order; the (tenantId, lastName, _id) index serves it and the cursors
+PAGE_SORT = [("tenantId", 1), ("lastName", 1), ("_id", 1)]
+PageKey = Tuple[str, str, str]
+
+
+def encode_cursor(key: PageKey) -> str:
+    raw = json.dumps(list(key), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> PageKey:
+    """Inverse of encode_cursor; ValueError if the cursor was tampered with."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        tenant_id, last_name, user_id = json.loads(raw)
+    except Exception:
+        raise ValueError("Invalid cursor")
+    # Anything but str/None would become an operator or bad type in _after
+    if not all(isinstance(v, (str, type(None))) for v in (tenant_id, last_name)):
+        raise ValueError("Invalid cursor")
+    if not isinstance(user_id, str) or not ObjectId.is_valid(user_id):
+        raise ValueError("Invalid cursor")
+    return tenant_id, last_name, user_id
+
+
+def _after(key: PageKey) -> dict:
+    """Filter for documents strictly after `key` in PAGE_SORT order."""
+    tenant_id, last_name, user_id = key
+    return {
+        "$or": [
+            {"tenantId": {"$gt": tenant_id}},
+            {"tenantId": tenant_id, "lastName": {"$gt": last_name}},
+            {
+                "tenantId": tenant_id,
+                "lastName": last_name,
+                "_id": {"$gt": ObjectId(user_id)},
+            },
+        ]
+    }
+
+
+def _path(doc: dict, field: str):
+    """Value at a dotted path, None if any part is missing."""
+    for part in field.split("."):
+        if not isinstance(doc, dict):
+            return None
+        doc = doc.get(part)
+    return doc
+
+
+def _sparse(doc: dict) -> dict:
+    return {key: json_value(value) for key, value in doc.items()}
+
 
 class UserRepository:
     def __init__(self):
         self.collection_name = "users"
 
-    def collection(self):
-        return db.get_db()[self.collection_name]
+    def collection(self, intent: Optional[str] = None):
+        return db.get_db(intent)[self.collection_name]
 
     async def create(self, user: User) -> User:
         data = user.model_dump(by_alias=True, exclude={"id"})
+        data["nameTokens"] = name_tokens(user.firstName, user.lastName)
         result = await self.collection().insert_one(data)
         user.id = str(result.inserted_id)
         return user
 
-    async def get_by_id(self, user_id: str) -> Optional[User]:
+    async def create_many(self, users: List[User]) -> BulkResult:
+        """
+        Insert in unordered batches; result items follow `users`, and the
+        inserted ones get their id set. A taken email fails its own item
+        with duplicate_key without stopping the rest.
+        """
+        docs = []
+        for user in users:
+            data = user.model_dump(by_alias=True, exclude={"id"})
+            data["nameTokens"] = name_tokens(user.firstName, user.lastName)
+            docs.append(data)
+        ops, ids = insert_ops(docs)
+        result = await bulk_apply(self.collection(), ops, ids)
+        for item in result.items:
+            if item.ok:
+                users[item.index].id = item.id
+        return result
+
+    async def get_by_id(
+        self, user_id: str, fields: Optional[List[str]] = None
+    ) -> Optional[Union[User, dict]]:
+        """The user, or only the requested fields as a plain dict."""
         if not ObjectId.is_valid(user_id):
             return None
-        doc = await self.collection().find_one({"_id": ObjectId(user_id)})
+        doc = await self.collection().find_one(
+            {"_id": ObjectId(user_id)}, build_projection(fields)
+        )
         if not doc:
             return None
+        if fields:
+            return _sparse(doc)
         doc["_id"] = str(doc["_id"])
         return User.model_validate(doc)
 
+    async def get_many(
+        self,
+        user_ids: Optional[List[str]] = None,
+        emails: Optional[List[str]] = None,
+        fields: Optional[List[str]] = None,
+    ) -> List[Optional[dict]]:
+        """
+        Users for `user_ids` then `emails`, in that order and one-for-one
+        (duplicates repeat), None where nothing matches. One $in query for
+        both lists; users come back serialized like get_page.
+        """
+        user_ids, emails = user_ids or [], emails or []
+        oids = [ObjectId(u) for u in dict.fromkeys(user_ids) if ObjectId.is_valid(u)]
+        clauses = []
+        if oids:
+            clauses.append({"_id": {"$in": oids}})
+        if emails:
+            clauses.append({"email": {"$in": list(dict.fromkeys(emails))}})
+        docs = []
+        if clauses:
+            projection = build_projection(fields)
+            if fields:
+                # Needed to put results back in input order
+                projection = {**projection, "_id": 1, "email": 1}
+            query = clauses[0] if len(clauses) == 1 else {"$or": clauses}
+            docs = await self.collection().find(query, projection).to_list(length=None)
+
+        by_id = {str(doc["_id"]): doc for doc in docs}
+        by_email = {doc.get("email"): doc for doc in docs}
+        matches = [by_id.get(u) for u in user_ids] + [by_email.get(e) for e in emails]
+        if not fields:
+            return [serialize_user(doc) if doc else None for doc in matches]
+        requested = {field.split(".", 1)[0] for field in fields}
+        return [
+            _sparse({k: v for k, v in doc.items() if k in requested}) if doc else None
+            for doc in matches
+        ]
+
+    async def get_grants(self, user_ids: List[str]) -> Dict[str, dict]:
+        """Fields needed for authorization, for many users in one query."""
+        oids = [ObjectId(u) for u in user_ids if ObjectId.is_valid(u)]
+        if not oids:
+            return {}
+        cursor = self.collection(READ_PRIMARY).find(
+            {"_id": {"$in": oids}},
+            {
+                "roleIds": 1,
+                "permissionIds": 1,
+                "tenantId": 1,
+                "enabled": 1,
+                "deletedAt": 1,
+                "attributes": 1,
+            },
+        )
+        return {str(doc["_id"]): doc async for doc in cursor}
+
     async def get_by_email(self, email: str) -> Optional[User]:
         doc = await self.collection().find_one({"email": email})
         if not doc:
@@ -37,33 +207,203 @@ class UserRepository:
         doc["_id"] = str(doc["_id"])
         return User.model_validate(doc)
 
-    async def get_all(
+    async def get_page(
         self,
-        skip: int = 0,
-        limit: int = 20,
-        filter_query: Optional[dict] = None,
-    ) -> List[User]:
-        filter_query = filter_query or {}
-        log.debug(f"get_all filter_query -> {filter_query}")
+        filter_query: dict,
+        limit: int,
+        after: Optional[PageKey] = None,
+        intent: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+    ) -> Tuple[List[dict], Optional[PageKey]]:
+        """
+        One page of users in PAGE_SORT order, starting after `after`, plus
+        the key to continue from (None on the last page). Each page is an
+        index range scan, so its cost does not grow with the page number.
+        Users come back as JSON-ready dicts, not validated models.
+        """
+        if after is not None:
+            filter_query = {"$and": [filter_query, _after(after)]}
+        projection = build_projection(fields)
+        if fields:
+            # The sort keys are needed for the next cursor even if not asked for
+            projection = {**projection, "tenantId": 1, "lastName": 1, "_id": 1}
 
-        cursor = self.collection().find(filter_query).skip(skip).limit(limit)
-        users = []
+        cursor = (
+            self.collection(intent)
+            .find(filter_query, projection, session=db.session(intent))
+            .sort(PAGE_SORT)
+            .limit(limit + 1)
+        )
+        docs = await cursor.to_list(length=limit + 1)
+        next_key = None
+        if len(docs) > limit:
+            docs = docs[:limit]
+            last = docs[-1]
+            next_key = (last.get("tenantId"), last.get("lastName"), str(last["_id"]))
 
-        async for doc in cursor:
-            doc["_id"] = str(doc["_id"])
-            users.append(User.model_validate(doc))
+        if fields:
+            requested = {field.split(".", 1)[0] for field in fields}
+            return [
+                _sparse({k: v for k, v in doc.items() if k in requested})
+                for doc in docs
+            ], next_key
+        return [serialize_user(doc) for doc in docs], next_key
 
-        return users
+    async def iter_users(
+        self,
+        filter_query: dict,
+        intent: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+        session=None,
+    ) -> AsyncIterator[dict]:
+        """
+        Every matching user in PAGE_SORT order, serialized like get_page,
+        fetched STREAM_BATCH_SIZE documents at a time so memory stays flat.
+        """
+        cursor = (
+            self.collection(intent)
+            .find(filter_query, build_projection(fields), session=session)
+            .sort(PAGE_SORT)
+            .batch_size(config.STREAM_BATCH_SIZE)
+        )
+        serialize = _sparse if fields else serialize_user
+        async for doc in cursor:
+            yield serialize(doc)
 
     async def update(self, user_id: str, update_data: dict) -> bool:
         if not ObjectId.is_valid(user_id):
             return False
         update_data["updatedAt"] = datetime.utcnow()
+        to_set = update_data
+        if "firstName" in update_data or "lastName" in update_data:
+            to_set = {
+                **update_data,
+                "nameTokens": await self._name_tokens_after(user_id, update_data),
+            }
         res = await self.collection().update_one(
-            {"_id": ObjectId(user_id)}, {"$set": update_data}
+            {"_id": ObjectId(user_id)}, {"$set": to_set}
         )
         return res.modified_count > 0
 
+    async def update_changes(
+        self, user_id: str, update_data: dict, meta: Optional[dict] = None
+    ) -> dict:
+        """
+        Apply `update_data` only if it changes the user. Returns the previous
+        values of the fields that changed; {} if none did or there is no such
+        user. `meta` (e.g. updatedBy) is written with a real change but never
+        counts as one. A changed secret (the password hash) is reported as
+        REDACTED_CHANGE; its stored value is never read.
+
+        The $ne filter keeps no-op updates from writing at all, and the
+        pre-image from find_one_and_update gives the diff in the same round
+        trip, so a no-op costs exactly one round trip.
+        """
+        if not update_data or not ObjectId.is_valid(user_id):
+            return {}
+        oid = ObjectId(user_id)
+        to_set = {**update_data, **(meta or {}), "updatedAt": datetime.utcnow()}
+        renamed = {"firstName", "lastName"} & update_data.keys()
+        projection = {k: 1 for k in update_data if k not in SECRET_FIELDS}
+        secret_fields = [k for k in update_data if k in SECRET_FIELDS]
+        for k in secret_fields:
+            # Compared on the server (4.4+ projection expression); $literal
+            # since a bcrypt hash starts with "$" like a field path
+            projection[f"{k}Changed"] = {"$ne": [f"${k}", {"$literal": update_data[k]}]}
+        if len(renamed) == 2:
+            to_set["nameTokens"] = name_tokens(
+                update_data["firstName"], update_data["lastName"]
+            )
+        elif renamed:
+            # The other half of the name comes back in the pre-image
+            projection.update(firstName=1, lastName=1)
+        before = await self.collection().find_one_and_update(
+            {
+                "_id": oid,
+                "$or": [{k: {"$ne": v}} for k, v in update_data.items()],
+            },
+            {"$set": to_set},
+            projection=projection,
+            return_document=ReturnDocument.BEFORE,
+        )
+        if before is None:
+            return {}
+        # $ne compares embedded documents field-order sensitively; the diff
+        # here does not, so a reordered but equal value is not a change
+        changed = {
+            k: _path(before, k)
+            for k, v in update_data.items()
+            if k not in SECRET_FIELDS and _path(before, k) != v
+        }
+        for k in secret_fields:
+            if before.get(f"{k}Changed"):
+                changed[k] = REDACTED_CHANGE
+        if len(renamed) == 1 and renamed & changed.keys():
+            names = {
+                k: update_data[k] if k in update_data else before.get(k, "")
+                for k in ("firstName", "lastName")
+            }
+            # Matched on both names: a concurrent rename sets its own tokens
+            await self.collection().update_one(
+                {"_id": oid, **names},
+                {"$set": {"nameTokens": name_tokens(*names.values())}},
+            )
+        return changed
+
+    async def _name_tokens_after(self, user_id: str, update_data: dict) -> List[str]:
+        """nameTokens after a name change, reading the unchanged half if needed."""
+        names = {k: update_data.get(k) for k in ("firstName", "lastName")}
+        if None in names.values():
+            current = await self.collection(READ_PRIMARY).find_one(
+                {"_id": ObjectId(user_id)}, {"firstName": 1, "lastName": 1}
+            )
+            for key, value in names.items():
+                if value is None:
+                    names[key] = (current or {}).get(key, "")
+        return name_tokens(names["firstName"], names["lastName"])
+
+    async def update_many_by_ids(self, user_ids: List[str], data: dict) -> BulkResult:
+        """The same $set on many users; see users.repositories.bulk."""
+        if "firstName" in data or "lastName" in data:
+            # nameTokens depend on each user's other name; use update()
+            raise ValueError("Names cannot be bulk-updated")
+        return await update_by_ids(self.collection(), user_ids, data)
+
+    async def grant(
+        self,
+        user_ids: List[str],
+        role_ids: Optional[List[str]] = None,
+        permission_ids: Optional[List[str]] = None,
+    ) -> int:
+        """Atomically add roles and permissions to users; returns users changed."""
+        return await add_to_set_by_ids(
+            self.collection(),
+            user_ids,
+            {"roleIds": role_ids or [], "permissionIds": permission_ids or []},
+        )
+
+    async def revoke(
+        self,
+        user_ids: List[str],
+        role_ids: Optional[List[str]] = None,
+        permission_ids: Optional[List[str]] = None,
+    ) -> int:
+        """Atomically remove roles and permissions from users; returns users changed."""
+        return await pull_by_ids(
+            self.collection(),
+            user_ids,
+            {"roleIds": role_ids or [], "permissionIds": permission_ids or []},
+        )
+
+    async def bulk_apply(
+        self, ops: list, ids: Optional[List[Optional[str]]] = None
+    ) -> BulkResult:
+        """
+        Arbitrary pymongo write operations, unordered and chunked. Callers
+        that change names must maintain nameTokens themselves.
+        """
+        return await bulk_apply(self.collection(), ops, ids)
+
     async def soft_delete(self, user_id: str) -> bool:
         if not ObjectId.is_valid(user_id):
             return False
@@ -78,11 +418,5 @@ class UserRepository:
         )
         return res.modified_count > 0
 
-    async def ensure_indexes(self):
-        await self.collection().create_index("email", unique=True)
-        await self.collection().create_index("roleIds")
-        await self.collection().create_index("permissionIds")
-        await self.collection().create_index("deletedAt", expireAfterSeconds=7776000)
-
 
 user_repo = UserRepository()
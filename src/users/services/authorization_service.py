@@ -0,0 +1,411 @@
+from users.repositories.permission_repository import permission_repo
+from users.repositories.role_repository import role_repo
+from users.repositories.user_repository import user_repo
+from users.models.domain import AuthzCheck, Permission, Role
+from users.utils.events import event_listener
+from users.utils.db import READ_PRIMARY
+from users.config.config import config
+from users.config.logging_config import get_logger
+from fastapi import HTTPException
+from collections import OrderedDict
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set
+import asyncio
+import time
+
+log = get_logger(__name__)
+
+
+class PermissionTable:
+    """
+    The permission catalogue compiled to bitsets.
+
+    Every permission gets one bit (addressable by id or name). Every role
+    keeps the transitive closure of the roles it inherits from and a mask of
+    all permissions along that closure, so a user's effective access is the
+    OR of their direct roles' masks no matter how deep the hierarchy is, and
+    checking it is a single AND.
+    """
+
+    def __init__(self, permissions: List[Permission], roles: List[Role], version: int):
+        self.version = version
+        self.bits: Dict[str, int] = {}
+        for position, perm in enumerate(permissions):
+            bit = 1 << position
+            self.bits[str(perm.id)] = bit
+            self.bits[perm.name] = bit
+        self.permission_count = len(permissions)
+
+        self._roles: Dict[str, Role] = {}
+        self._children: Dict[str, Set[str]] = {}
+        # role id -> the role itself plus every role it inherits from
+        self.closure: Dict[str, FrozenSet[str]] = {}
+        # role id and role name -> mask over the whole closure
+        self.role_masks: Dict[str, int] = {}
+        for role in roles:
+            self._link(role)
+        self._recompute(set(self._roles))
+
+    @property
+    def role_count(self) -> int:
+        return len(self._roles)
+
+    def _link(self, role: Role):
+        role_id = str(role.id)
+        self._roles[role_id] = role
+        for parent_id in role.parentRoleIds:
+            self._children.setdefault(parent_id, set()).add(role_id)
+
+    def _unlink(self, role_id: str):
+        role = self._roles.pop(role_id, None)
+        if role is None:
+            return
+        for parent_id in role.parentRoleIds:
+            children = self._children.get(parent_id)
+            if children is not None:
+                children.discard(role_id)
+        self.closure.pop(role_id, None)
+        self.role_masks.pop(role_id, None)
+        self.role_masks.pop(role.name, None)
+
+    def _descendants(self, role_id: str) -> Set[str]:
+        found = {role_id}
+        stack = [role_id]
+        while stack:
+            for child in self._children.get(stack.pop(), ()):
+                if child not in found:
+                    found.add(child)
+                    stack.append(child)
+        return found
+
+    def _resolve(self, role_id: str, stale: Set[str], visiting: Set[str]):
+        if role_id not in stale:
+            return self.closure[role_id], self.role_masks[role_id]
+        role = self._roles[role_id]
+        visiting.add(role_id)
+        closure = {role_id}
+        mask = self.mask_of(role.permissionIds)
+        for parent_id in role.parentRoleIds:
+            if parent_id not in self._roles:
+                continue
+            if parent_id in visiting:
+                log.warning(f"Ignoring inheritance cycle {role_id} -> {parent_id}")
+                continue
+            parent_closure, parent_mask = self._resolve(parent_id, stale, visiting)
+            closure |= parent_closure
+            mask |= parent_mask
+        visiting.discard(role_id)
+        stale.discard(role_id)
+        self.closure[role_id] = frozenset(closure)
+        self.role_masks[role_id] = mask
+        self.role_masks[role.name] = mask
+        return self.closure[role_id], mask
+
+    def _recompute(self, stale: Set[str]):
+        for role_id in list(stale):
+            if role_id in stale:
+                self._resolve(role_id, stale, set())
+
+    def upsert_role(self, role: Role):
+        """Apply one changed role, recomputing only it and its descendants."""
+        role_id = str(role.id)
+        self._unlink(role_id)
+        self._link(role)
+        self._recompute(self._descendants(role_id))
+        self.version += 1
+
+    def remove_role(self, role_id: str):
+        stale = self._descendants(role_id)
+        stale.discard(role_id)
+        self._unlink(role_id)
+        self._recompute(stale)
+        self.version += 1
+
+    def would_cycle(self, role_id: str, parent_ids: Iterable[str]) -> bool:
+        return any(
+            parent_id == role_id or role_id in self.closure.get(parent_id, ())
+            for parent_id in parent_ids
+        )
+
+    def mask_of(self, permissions: Iterable[str]) -> int:
+        mask = 0
+        for perm in permissions:
+            mask |= self.bits.get(perm, 0)
+        return mask
+
+    def roles_mask(self, roles: Iterable[str]) -> int:
+        mask = 0
+        for role in roles:
+            mask |= self.role_masks.get(role, 0)
+        return mask
+
+    def required_mask(self, permissions: Iterable[str]) -> Optional[int]:
+        """Mask for the given permissions, or None if any of them is unknown."""
+        mask = 0
+        for perm in permissions:
+            bit = self.bits.get(perm)
+            if bit is None:
+                return None
+            mask |= bit
+        return mask
+
+
+class _Subject:
+    """A user's grants plus the mask and decisions derived from them."""
+
+    __slots__ = (
+        "user_id",
+        "expires_at",
+        "role_ids",
+        "permission_ids",
+        "tenant_id",
+        "active",
+        "attributes",
+        "version",
+        "mask",
+        "decisions",
+    )
+
+    def __init__(
+        self,
+        user_id,
+        expires_at,
+        role_ids,
+        permission_ids,
+        tenant_id,
+        active,
+        attributes,
+    ):
+        self.user_id = user_id
+        self.expires_at = expires_at
+        self.role_ids = role_ids
+        self.permission_ids = permission_ids
+        self.tenant_id = tenant_id
+        self.active = active
+        self.attributes = attributes
+        # Derived state, valid only for this PermissionTable version
+        self.version = -1
+        self.mask = 0
+        self.decisions: Dict[tuple, bool] = {}
+
+
+class AuthorizationService:
+    def __init__(self):
+        self.table = PermissionTable([], [], 0)
+        self._subjects: "OrderedDict[str, _Subject]" = OrderedDict()
+        self._rebuild_task: Optional[asyncio.Task] = None
+        self._refresh_loop: Optional[asyncio.Task] = None
+        self.subject_hits = 0
+        self.subject_misses = 0
+
+    async def _rebuild(self):
+        permissions = await permission_repo.get_all(READ_PRIMARY)
+        roles = await role_repo.get_all(READ_PRIMARY)
+        self.table = PermissionTable(permissions, roles, self.table.version + 1)
+        log.info(
+            f"Permission table v{self.table.version} built: "
+            f"{len(permissions)} permissions, {len(roles)} roles"
+        )
+
+    async def rebuild(self):
+        """Reload roles and permissions; concurrent callers share one rebuild."""
+        if self._rebuild_task is None or self._rebuild_task.done():
+            self._rebuild_task = asyncio.ensure_future(self._rebuild())
+        await asyncio.shield(self._rebuild_task)
+
+    def invalidate_subject(self, user_id: str):
+        self._subjects.pop(user_id, None)
+
+    def _cached_subject(self, user_id: str, now: float) -> Optional["_Subject"]:
+        subject = self._subjects.get(user_id)
+        if subject is None or subject.expires_at <= now:
+            self.subject_misses += 1
+            return None
+        self.subject_hits += 1
+        self._subjects.move_to_end(user_id)
+        return subject
+
+    def _remember_subject(self, subject: "_Subject"):
+        self._subjects[subject.user_id] = subject
+        self._subjects.move_to_end(subject.user_id)
+        while len(self._subjects) > config.AUTHZ_SUBJECT_CACHE_SIZE:
+            self._subjects.popitem(last=False)
+
+    async def _load_subjects(self, user_ids: List[str]) -> Dict[str, "_Subject"]:
+        """Fetch grants for all uncached users with one $in query."""
+        now = time.time()
+        found = {}
+        missing = []
+        for user_id in user_ids:
+            subject = self._cached_subject(user_id, now)
+            if subject is None:
+                missing.append(user_id)
+            else:
+                found[user_id] = subject
+        if not missing:
+            return found
+
+        docs = await user_repo.get_grants(missing)
+        role_ids = {r for doc in docs.values() for r in doc.get("roleIds", [])}
+        unknown_roles = [r for r in role_ids if r not in self.table.closure]
+        if unknown_roles:
+            for role in await role_repo.get_by_ids(unknown_roles):
+                self.apply_role(role)
+
+        expires_at = now + config.AUTHZ_SUBJECT_CACHE_TTL
+        for user_id, doc in docs.items():
+            subject = _Subject(
+                user_id,
+                expires_at,
+                tuple(doc.get("roleIds", [])),
+                tuple(doc.get("permissionIds", [])),
+                doc.get("tenantId"),
+                bool(doc.get("enabled", True)) and not doc.get("deletedAt"),
+                doc.get("attributes") or {},
+            )
+            self._remember_subject(subject)
+            found[user_id] = subject
+        return found
+
+    def _subject_mask(self, subject: "_Subject") -> int:
+        table = self.table
+        if subject.version != table.version:
+            subject.mask = table.roles_mask(subject.role_ids) | table.mask_of(
+                subject.permission_ids
+            )
+            subject.version = table.version
+            subject.decisions.clear()
+        return subject.mask
+
+    async def subject_mask(self, token_data: dict) -> int:
+        """Effective permission mask of the caller: roles plus direct grants."""
+        user_id = token_data.get("sub", "")
+        subject = (await self._load_subjects([user_id])).get(user_id)
+        if subject is None:
+            # Not a stored user (e.g. a client_credentials token): trust its roles
+            return self.table.roles_mask(token_data.get("roles", []))
+        if not subject.active:
+            # Disabled or deleted users keep no permissions, as in _decide
+            return 0
+        return self._subject_mask(subject)
+
+    async def subject_attributes(self, token_data: dict) -> dict:
+        """The caller's stored User.attributes, from the same cached lookup."""
+        user_id = token_data.get("sub", "")
+        subject = (await self._load_subjects([user_id])).get(user_id)
+        return subject.attributes if subject is not None else {}
+
+    async def has_permissions(
+        self, token_data: dict, permissions: Iterable[str]
+    ) -> bool:
+        required = self.table.required_mask(permissions)
+        if required is None:
+            return False
+        mask = await self.subject_mask(token_data)
+        return mask & required == required
+
+    def _decide(self, subject: Optional["_Subject"], action: str, tenant_id) -> bool:
+        if subject is None or not subject.active:
+            return False
+        mask = self._subject_mask(subject)
+        key = (action, tenant_id)
+        allowed = subject.decisions.get(key)
+        if allowed is None:
+            required = self.table.required_mask((action,))
+            allowed = (
+                required is not None
+                and mask & required == required
+                and (tenant_id is None or tenant_id == subject.tenant_id)
+            )
+            subject.decisions[key] = allowed
+        return allowed
+
+    async def check_batch(
+        self, checks: List[AuthzCheck], tenant_id: Optional[str] = None
+    ) -> List[dict]:
+        """
+        Answer many (subject, action, tenant) questions with at most one user
+        lookup and one role lookup, in the order they were asked. With
+        `tenant_id`, asking about a user of another tenant is a 403.
+        """
+        subjects = await self._load_subjects(list({c.subject for c in checks}))
+        if tenant_id is not None and any(
+            s.tenant_id != tenant_id for s in subjects.values()
+        ):
+            raise HTTPException(403, "Subject not in the credential's tenant")
+        return [
+            {
+                "subject": c.subject,
+                "action": c.action,
+                "tenantId": c.tenantId,
+                "allowed": self._decide(subjects.get(c.subject), c.action, c.tenantId),
+            }
+            for c in checks
+        ]
+
+    def apply_role(self, role: Role):
+        self.table.upsert_role(role)
+
+    def forget_role(self, role_id: str):
+        self.table.remove_role(role_id)
+
+    async def _on_role_event(self, event_type: str, data: dict):
+        role_ids = data.get("ids") or ([data["id"]] if data.get("id") else [])
+        if not role_ids:
+            await self.rebuild()
+            return
+        role_ids = [str(r) for r in role_ids]
+        roles = {}
+        if event_type != "ROLE_DELETED":
+            roles = {r.id: r for r in await role_repo.get_by_ids(role_ids)}
+        for role_id in role_ids:
+            if role_id in roles:
+                self.apply_role(roles[role_id])
+            else:
+                self.forget_role(role_id)
+
+    async def _on_permission_event(self, event_type: str, data: dict):
+        await self.rebuild()
+
+    async def _on_user_event(self, event_type: str, data: dict):
+        for user_id in data.get("ids") or [data.get("id")]:
+            if user_id:
+                self.invalidate_subject(str(user_id))
+
+    async def refresh_forever(self):
+        while True:
+            await asyncio.sleep(config.AUTHZ_REFRESH_SECONDS)
+            try:
+                await self.rebuild()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.error(f"Permission table refresh failed: {e}")
+
+    async def start(self):
+        try:
+            await self.rebuild()
+        except Exception as e:
+            log.error(f"Permission table build failed: {e}")
+        event_listener.subscribe("role_events", self._on_role_event)
+        event_listener.subscribe("permission_events", self._on_permission_event)
+        event_listener.subscribe("user_events", self._on_user_event)
+        self._refresh_loop = asyncio.ensure_future(self.refresh_forever())
+
+    async def stop(self):
+        if self._refresh_loop:
+            self._refresh_loop.cancel()
+
+    def stats(self) -> dict:
+        return {
+            "table_version": self.table.version,
+            "permissions": self.table.permission_count,
+            "roles": self.table.role_count,
+            "subject_cache": {
+                "size": len(self._subjects),
+                "hits": self.subject_hits,
+                "misses": self.subject_misses,
+            },
+        }
+
+
+authorization_service = AuthorizationService()
@@ -1,5 +1,6 @@
 from users.repositories.permission_repository import permission_repo
 from users.repositories.audit_repository import audit_repo
+from users.services.authorization_service import authorization_service
 from users.models.domain import Permission
 from users.utils.events import publish_event
 from datetime import datetime
@@ -15,6 +16,10 @@ class PermissionService:
         await audit_repo.log_event(
             "CREATE_PERMISSION", "permissions", created.id, performed_by
         )
+        await authorization_service.rebuild()
+        await publish_event(
+            "permission_events", "PERMISSION_CREATED", created.model_dump()
+        )
         return created
 
     async def delete_permission(self, perm_id: str, performed_by: str):
@@ -24,6 +29,8 @@ class PermissionService:
         await audit_repo.log_event(
             "DELETE_PERMISSION", "permissions", perm_id, performed_by
         )
+        await authorization_service.rebuild()
+        await publish_event("permission_events", "PERMISSION_DELETED", {"id": perm_id})
 
     async def get_all(self):
         return await permission_repo.get_all()
@@ -0,0 +1,294 @@
+from users.repositories.policy_repository import policy_repo
+from users.repositories.audit_repository import audit_repo
+from users.models.domain import Policy
+from users.utils.events import event_listener, publish_event
+from users.utils.db import READ_PRIMARY
+from fastapi import HTTPException
+from pydantic import ValidationError
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from users.config.logging_config import get_logger
+import ast
+import operator
+
+log = get_logger(__name__)
+
+Predicate = Callable[[dict], bool]
+
+# Names a condition may start from; everything else is rejected at compile time
+CONTEXT_ROOTS = ("subject", "attributes", "resource", "action")
+
+_COMPARATORS = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.In: lambda a, b: a in b,
+    ast.NotIn: lambda a, b: a not in b,
+}
+
+
+class PolicyCompileError(ValueError):
+    pass
+
+
+def _compile_value(node: ast.AST) -> Callable[[dict], Any]:
+    if isinstance(node, ast.Constant):
+        value = node.value
+        return lambda ctx: value
+
+    if isinstance(node, (ast.List, ast.Tuple, ast.Set)):
+        if not all(isinstance(e, ast.Constant) for e in node.elts):
+            raise PolicyCompileError("Only literal values are allowed in lists")
+        values = frozenset(e.value for e in node.elts)
+        return lambda ctx: values
+
+    # attributes.department -> ("attributes", "department")
+    path = []
+    while isinstance(node, ast.Attribute):
+        path.append(node.attr)
+        node = node.value
+    if not isinstance(node, ast.Name) or node.id not in CONTEXT_ROOTS:
+        raise PolicyCompileError(
+            f"Conditions may only reference {', '.join(CONTEXT_ROOTS)} and literals"
+        )
+    root = node.id
+    path.reverse()
+
+    if not path:
+        return lambda ctx: ctx.get(root)
+    if len(path) == 1:
+        key = path[0]
+
+        def get_one(ctx):
+            value = ctx.get(root)
+            return value.get(key) if isinstance(value, dict) else None
+
+        return get_one
+
+    def get_path(ctx):
+        value = ctx.get(root)
+        for key in path:
+            if not isinstance(value, dict):
+                return None
+            value = value.get(key)
+        return value
+
+    return get_path
+
+
+def _is_none_literal(node: ast.AST) -> bool:
+    return isinstance(node, ast.Constant) and node.value is None
+
+
+def _compile_compare(left_node, op, right_node) -> Predicate:
+    compare = _COMPARATORS.get(type(op))
+    if compare is None:
+        raise PolicyCompileError(f"Unsupported operator {type(op).__name__}")
+    left = _compile_value(left_node)
+    right = _compile_value(right_node)
+    # Unless the condition explicitly tests for None, a missing value never
+    # satisfies a comparison, so two absent attributes are not "equal".
+    strict = not (_is_none_literal(left_node) or _is_none_literal(right_node))
+
+    def predicate(ctx):
+        a = left(ctx)
+        b = right(ctx)
+        if strict and (a is None or b is None):
+            return False
+        try:
+            return compare(a, b)
+        except TypeError:
+            return False
+
+    return predicate
+
+
+def _compile_node(node: ast.AST) -> Predicate:
+    if isinstance(node, ast.BoolOp):
+        parts = [_compile_node(v) for v in node.values]
+        if isinstance(node.op, ast.And):
+            return lambda ctx: all(p(ctx) for p in parts)
+        return lambda ctx: any(p(ctx) for p in parts)
+
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+        inner = _compile_node(node.operand)
+        return lambda ctx: not inner(ctx)
+
+    if isinstance(node, ast.Compare):
+        operands = [node.left] + node.comparators
+        parts = [
+            _compile_compare(operands[i], op, operands[i + 1])
+            for i, op in enumerate(node.ops)
+        ]
+        if len(parts) == 1:
+            return parts[0]
+        return lambda ctx: all(p(ctx) for p in parts)
+
+    # A bare reference is tested for truthiness, e.g. "attributes.isManager"
+    value = _compile_value(node)
+    return lambda ctx: bool(value(ctx))
+
+
+def compile_condition(condition: str) -> Predicate:
+    """
+    Compile a policy condition into a Python predicate over a context dict.
+
+    Conditions are a small, safe subset of Python expressions: and/or/not,
+    comparisons (including in / not in), literals, and dotted references
+    rooted at subject, attributes, resource or action. Nothing is eval'd.
+    """
+    try:
+        tree = ast.parse(condition, mode="eval")
+    except SyntaxError as e:
+        raise PolicyCompileError(f"Invalid condition: {e.msg}")
+    return _compile_node(tree.body)
+
+
+class PolicySet:
+    """Compiled policies grouped by action: (deny predicates, allow predicates)."""
+
+    def __init__(self, compiled: List[Tuple[Policy, Predicate]], version: int):
+        self.version = version
+        self.size = len(compiled)
+        wildcard = ([], [])
+        per_action: Dict[str, Tuple[list, list]] = {}
+        for policy, predicate in compiled:
+            bucket = 0 if policy.effect == "deny" else 1
+            for action in policy.actions:
+                target = (
+                    wildcard
+                    if action == "*"
+                    else per_action.setdefault(action, ([], []))
+                )
+                target[bucket].append(predicate)
+        self._wildcard = (tuple(wildcard[0]), tuple(wildcard[1]))
+        self._by_action = {
+            action: (
+                tuple(denies) + self._wildcard[0],
+                tuple(allows) + self._wildcard[1],
+            )
+            for action, (denies, allows) in per_action.items()
+        }
+
+    def evaluate(self, action: str, context: dict) -> bool:
+        """
+        Deny overrides allow; with no matching allow the answer is deny, so
+        an action without any policy is never granted.
+        """
+        denies, allows = self._by_action.get(action, self._wildcard)
+        for predicate in denies:
+            if predicate(context):
+                return False
+        for predicate in allows:
+            if predicate(context):
+                return True
+        return False
+
+
+class PolicyService:
+    def __init__(self):
+        self.policies = PolicySet([], 0)
+        # (policy id, version) -> predicate, so reloads only compile changes
+        self._compiled: Dict[Tuple[str, int], Predicate] = {}
+
+    def _compile(self, policy: Policy) -> Optional[Predicate]:
+        key = (str(policy.id), policy.version)
+        predicate = self._compiled.get(key)
+        if predicate is None:
+            try:
+                predicate = compile_condition(policy.condition)
+            except PolicyCompileError as e:
+                log.error(f"Skipping policy {policy.name}: {e}")
+                return None
+            self._compiled[key] = predicate
+        return predicate
+
+    async def reload(self):
+        policies = [p for p in await policy_repo.get_all(READ_PRIMARY) if p.enabled]
+        compiled = []
+        for policy in policies:
+            predicate = self._compile(policy)
+            if predicate is not None:
+                compiled.append((policy, predicate))
+        live = {(str(p.id), p.version) for p, _ in compiled}
+        self._compiled = {k: v for k, v in self._compiled.items() if k in live}
+        self.policies = PolicySet(compiled, self.policies.version + 1)
+        log.info(
+            f"Policy set v{self.policies.version} loaded: {len(compiled)} policies"
+        )
+
+    def evaluate(self, action: str, context: dict) -> bool:
+        return self.policies.evaluate(action, context)
+
+    def _validate(self, condition: str):
+        try:
+            compile_condition(condition)
+        except PolicyCompileError as e:
+            raise HTTPException(400, str(e))
+
+    async def create_policy(self, policy: Policy, performed_by: str) -> Policy:
+        self._validate(policy.condition)
+        policy.version = 1
+        created = await policy_repo.create(policy)
+        await audit_repo.log_event(
+            "CREATE_POLICY", "policies", created.id, performed_by
+        )
+        await self._changed("POLICY_CREATED", created.id)
+        return created
+
+    async def update_policy(self, policy_id: str, data: dict, performed_by: str):
+        data = {k: v for k, v in data.items() if k in Policy.model_fields}
+        for field in ("id", "version", "createdAt", "updatedAt"):
+            data.pop(field, None)
+        current = await policy_repo.get_by_id(policy_id)
+        if not current:
+            raise HTTPException(404, "Policy not found")
+        # Validate the policy as it will be stored, so reload() can load it
+        try:
+            merged = Policy.model_validate({**current.model_dump(), **data})
+        except ValidationError as e:
+            raise HTTPException(
+                400,
+                "; ".join(
+                    f"{'.'.join(map(str, err['loc']))}: {err['msg']}"
+                    for err in e.errors()
+                ),
+            )
+        self._validate(merged.condition)
+        data = {k: getattr(merged, k) for k in data}
+        if not await policy_repo.update(policy_id, data):
+            raise HTTPException(404, "Policy not found")
+        await audit_repo.log_event(
+            "UPDATE_POLICY", "policies", policy_id, performed_by, data
+        )
+        await self._changed("POLICY_UPDATED", policy_id)
+
+    async def delete_policy(self, policy_id: str, performed_by: str):
+        await policy_repo.delete(policy_id)
+        await audit_repo.log_event("DELETE_POLICY", "policies", policy_id, performed_by)
+        await self._changed("POLICY_DELETED", policy_id)
+
+    async def get_all(self) -> List[Policy]:
+        return await policy_repo.get_all()
+
+    async def _changed(self, event_type: str, policy_id: str):
+        await self.reload()
+        await publish_event("policy_events", event_type, {"id": policy_id})
+
+    async def _on_policy_event(self, event_type: str, data: dict):
+        await self.reload()
+
+    async def start(self):
+        try:
+            await self.reload()
+        except Exception as e:
+            log.error(f"Policy load failed: {e}")
+        event_listener.subscribe("policy_events", self._on_policy_event)
+
+    def stats(self) -> dict:
+        return {"version": self.policies.version, "policies": self.policies.size}
+
+
+policy_service = PolicyService()
@@ -1,10 +1,12 @@
 from users.repositories.role_repository import role_repo
 from users.repositories.user_repository import user_repo
 from users.repositories.audit_repository import audit_repo
+from users.services.authorization_service import authorization_service
 from users.models.domain import Role, MongoRef
 from users.utils.events import publish_event
 from fastapi import HTTPException
 from datetime import datetime
+from typing import List, Optional
 from users.config.logging_config import get_logger
 
 log = get_logger(__name__)
@@ -16,37 +18,86 @@ class RoleService:
         if existing:
             raise HTTPException(400, "Role already exists")
 
+        if role_in.parentRoleIds:
+            await self._check_parents(None, role_in.parentRoleIds)
+
         role_in.createdAt = datetime.utcnow()
         role_in.updatedAt = datetime.utcnow()
         created = await role_repo.create(role_in)
+        authorization_service.apply_role(created)
         await audit_repo.log_event("CREATE_ROLE", "roles", created.id, performed_by)
         await publish_event("role_events", "ROLE_CREATED", created.model_dump())
         return created
 
-    async def add_permission_to_role(
-        self, role_id: str, perm_ref: MongoRef, performed_by: str
+    async def _check_parents(self, role_id: Optional[str], parent_ids: List[str]):
+        parents = await role_repo.get_by_ids(parent_ids)
+        missing = set(parent_ids) - {p.id for p in parents}
+        if missing:
+            raise HTTPException(400, f"Parent roles not found: {sorted(missing)}")
+        if role_id and authorization_service.table.would_cycle(role_id, parent_ids):
+            raise HTTPException(400, "Role inheritance would create a cycle")
+
+    async def set_parent_roles(
+        self, role_id: str, parent_ids: List[str], performed_by: str
     ):
         role = await role_repo.get_by_id(role_id)
         if not role:
             raise HTTPException(404, "Role not found")
 
-        perms = role.permissions or []
-        # Check duplicate
+        parent_ids = list(dict.fromkeys(parent_ids))
+        await self._check_parents(role_id, parent_ids)
+
+        await role_repo.update(role_id, {"parentRoleIds": parent_ids})
+        role.parentRoleIds = parent_ids
+        authorization_service.apply_role(role)
+        await audit_repo.log_event(
+            "UPDATE_ROLE_PARENTS",
+            "roles",
+            role_id,
+            performed_by,
+            {"parentRoleIds": parent_ids},
+        )
+        await publish_event("role_events", "ROLE_UPDATED", {"id": role_id})
+
+    async def add_permission_to_role(
+        self, role_id: str, perm_ref: MongoRef, performed_by: str
+    ):
         target_oid = perm_ref.id_obj.get("$oid")
-        current_oids = [p.id_obj.get("$oid") for p in perms]
+        if not await self.grant_permissions([role_id], [target_oid], performed_by):
+            if not await role_repo.get_by_id(role_id):
+                raise HTTPException(404, "Role not found")
 
-        if target_oid not in current_oids:
-            perms.append(perm_ref)
-            await role_repo.update(
-                role_id, {"permissions": [p.model_dump(by_alias=True) for p in perms]}
+    async def grant_permissions(
+        self, role_ids: List[str], permission_ids: List[str], performed_by: str
+    ) -> int:
+        """Atomically add permissions to many roles; returns roles changed."""
+        role_ids = list(dict.fromkeys(role_ids))
+        changed = await role_repo.grant_permissions(role_ids, permission_ids)
+        if changed:
+            await self._permissions_changed(
+                role_ids, "UPDATE_ROLE_PERMS", {"added": permission_ids}, performed_by
             )
-            await audit_repo.log_event(
-                "UPDATE_ROLE_PERMS",
-                "roles",
-                role_id,
-                performed_by,
-                {"added_perm": target_oid},
+        return changed
+
+    async def revoke_permissions(
+        self, role_ids: List[str], permission_ids: List[str], performed_by: str
+    ) -> int:
+        """Atomically remove permissions from many roles; returns roles changed."""
+        role_ids = list(dict.fromkeys(role_ids))
+        changed = await role_repo.revoke_permissions(role_ids, permission_ids)
+        if changed:
+            await self._permissions_changed(
+                role_ids, "UPDATE_ROLE_PERMS", {"removed": permission_ids}, performed_by
             )
+        return changed
+
+    async def _permissions_changed(
+        self, role_ids: List[str], action: str, details: dict, performed_by: str
+    ):
+        for role in await role_repo.get_by_ids(role_ids):
+            authorization_service.apply_role(role)
+        await audit_repo.log_events(action, "roles", role_ids, performed_by, details)
+        await publish_event("role_events", "ROLE_UPDATED", {"ids": role_ids})
 
     async def delete_role(self, role_id: str, performed_by: str):
         # Check if any users have this role in their roleIds array
@@ -57,8 +108,14 @@ class RoleService:
             raise HTTPException(
                 400, f"Role is assigned to {users_with_role} users, cannot delete"
             )
+        child_roles = await role_repo.count_children(role_id)
+        if child_roles > 0:
+            raise HTTPException(
+                400, f"Role is inherited by {child_roles} roles, cannot delete"
+            )
 
         await role_repo.delete(role_id)
+        authorization_service.forget_role(role_id)
         await audit_repo.log_event("DELETE_ROLE", "roles", role_id, performed_by)
         await publish_event("role_events", "ROLE_DELETED", {"id": role_id})
 
@@ -0,0 +1,73 @@
+from users.repositories.service_credential_repository import service_credential_repo
+from users.repositories.audit_repository import audit_repo
+from users.models.domain import ServiceCredential
+from users.utils.events import publish_event
+from users.utils.service_auth import derive_signing_key, service_authenticator
+from fastapi import HTTPException
+from typing import List, Optional
+import secrets
+from users.config.logging_config import get_logger
+
+log = get_logger(__name__)
+
+
+class ServiceCredentialService:
+    async def create_credential(
+        self,
+        name: str,
+        roles: List[str],
+        tenant_id: Optional[str],
+        performed_by: str,
+    ) -> dict:
+        """
+        Issue a new client id and secret. The secret is returned only here;
+        the stored record keeps just the signing key derived from it.
+        """
+        client_id = f"svc_{secrets.token_hex(8)}"
+        secret = secrets.token_urlsafe(32)
+        credential = await service_credential_repo.create(
+            ServiceCredential(
+                clientId=client_id,
+                name=name,
+                signingKey=derive_signing_key(secret),
+                roles=roles,
+                tenantId=tenant_id,
+                createdBy=performed_by,
+            )
+        )
+        await audit_repo.log_event(
+            "CREATE_SERVICE_CREDENTIAL",
+            "service_credentials",
+            credential.id,
+            performed_by,
+            {"clientId": client_id, "roles": roles, "tenantId": tenant_id},
+        )
+        log.info(f"Service credential {client_id} issued to {name}")
+        return {
+            "clientId": client_id,
+            "clientSecret": secret,
+            "roles": roles,
+            "tenantId": tenant_id,
+        }
+
+    async def disable_credential(self, client_id: str, performed_by: str):
+        if not await service_credential_repo.set_enabled(client_id, False):
+            raise HTTPException(404, "Service credential not found")
+        service_authenticator.invalidate(client_id)
+        await audit_repo.log_event(
+            "DISABLE_SERVICE_CREDENTIAL",
+            "service_credentials",
+            client_id,
+            performed_by,
+        )
+        await publish_event(
+            "service_credential_events",
+            "SERVICE_CREDENTIAL_DISABLED",
+            {"clientId": client_id},
+        )
+
+    async def get_all(self) -> List[ServiceCredential]:
+        return await service_credential_repo.get_all()
+
+
+service_credential_service = ServiceCredentialService()
@@ -2,15 +2,25 @@ from ast import Dict
 from ast import Tuple
 from users.services.role_service import role_service
 from fastapi import UploadFile
-from users.repositories.user_repository import user_repo
+from users.repositories.user_repository import (
+    user_repo,
+    PROJECTABLE_FIELDS,
+    REDACTED_CHANGE,
+    SECRET_FIELDS,
+    decode_cursor,
+    encode_cursor,
+)
 from users.repositories.audit_repository import audit_repo
 from users.models.domain import User, MongoRef
 from users.utils.events import publish_event
+from users.utils.db import db, READ_PRIMARY
+from users.utils.name_search import search_terms, tokens_filter
 from users.services import otp_service, email_service
 from passlib.context import CryptContext
 from fastapi import HTTPException
 from datetime import datetime
-from typing import Optional, List
+from typing import AsyncIterator, Optional, List, Tuple
+from users.config.config import config
 from users.config.logging_config import get_logger
 import io
 import csv
@@ -21,8 +31,50 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
 class UserService:
-    async def get_user(self, user_id: str) -> Optional[User]:
-        return await user_repo.get_by_id(user_id)
+    def parse_fields(self, fields: Optional[str]) -> Optional[List[str]]:
+        """
+        Parse a fields= list such as "id,firstName,attributes.status" into
+        Mongo field names. Unknown fields (and the password) are a 400.
+        """
+        if not fields:
+            return None
+        parsed = []
+        for name in (f.strip() for f in fields.split(",")):
+            if not name:
+                continue
+            if name == "id":
+                name = "_id"
+            root, dotted, _ = name.partition(".")
+            if root not in PROJECTABLE_FIELDS or (dotted and root != "attributes"):
+                raise HTTPException(status_code=400, detail=f"Unknown field: {name}")
+            parsed.append(name)
+        return parsed or None
+
+    async def get_user(self, user_id: str, fields: Optional[List[str]] = None):
+        return await user_repo.get_by_id(user_id, fields)
+
+    async def get_users(
+        self,
+        user_ids: List[str],
+        emails: List[str],
+        fields: Optional[List[str]] = None,
+    ) -> List[dict]:
+        """
+        One entry per requested id, then per email, in request order:
+        {"key", "found", "user"}, with found=False and no user when missing.
+        """
+        if len(user_ids) + len(emails) > config.USER_BATCH_MAX:
+            raise HTTPException(
+                400, f"At most {config.USER_BATCH_MAX} ids and emails per request"
+            )
+        users = await user_repo.get_many(user_ids, emails, fields)
+        results = []
+        for key, user in zip(user_ids + emails, users):
+            if user is None:
+                results.append({"key": key, "found": False})
+            else:
+                results.append({"key": key, "found": True, "user": user})
+        return results
 
     async def create_auto_confirmed_user(
         self, user_in: User, performed_by: str, tenant: str
@@ -94,26 +146,68 @@ class UserService:
         await publish_event("user_events", "USER_PASSWORD_CHANGED", {"id": user_id})
 
     async def update_user(self, user_id: str, update_data: dict, performed_by: str):
+        """
+        Update only what differs; audit and publish just the changed fields.
+        Returns False when nothing changed (including an unknown user).
+        """
         # Remove protected fields if any?
         # For now trust admin
-        update_data["updatedBy"] = performed_by
-        success = await user_repo.update(user_id, update_data)
-        if success:
-            await audit_repo.log_event(
-                "UPDATE_USER", "users", user_id, performed_by, update_data
-            )
-            await publish_event(
-                "user_events", "USER_UPDATED", {"id": user_id, "changes": update_data}
-            )
-        return success
+        previous = await user_repo.update_changes(
+            user_id, update_data, {"updatedBy": performed_by}
+        )
+        if not previous:
+            log.debug(f"update_user {user_id}: no changes")
+            return False
+        changes = {
+            field: REDACTED_CHANGE if field in SECRET_FIELDS else update_data[field]
+            for field in previous
+        }
+        await audit_repo.log_event(
+            "UPDATE_USER",
+            "users",
+            user_id,
+            performed_by,
+            {"changes": changes, "previous": previous},
+        )
+        await publish_event(
+            "user_events", "USER_UPDATED", {"id": user_id, "changes": changes}
+        )
+        return True
+
+    async def search_users(
+        self,
+        query: dict,
+        fields: Optional[List[str]] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[dict], Optional[str]]:
+        """
+        One page of matching users and the cursor for the next page (None on
+        the last). limit defaults to PAGE_SIZE_DEFAULT, capped at PAGE_SIZE_MAX.
+        """
+        limit = min(limit or config.PAGE_SIZE_DEFAULT, config.PAGE_SIZE_MAX)
+        after = None
+        if cursor:
+            try:
+                after = decode_cursor(cursor)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+
+        mongo_filter = self._search_filter(query)
+        log.debug(f"search_users mongo_filter -> {mongo_filter}")
+        users, next_key = await user_repo.get_page(
+            mongo_filter, limit, after, fields=fields
+        )
+        return users, encode_cursor(next_key) if next_key else None
 
-    async def search_users(self, query: dict) -> List[User]:
+    def _search_filter(self, query: dict) -> dict:
         mongo_filter = {}
         if "name" in query and query["name"]:
-            mongo_filter["$or"] = [
-                {"firstName": {"$regex": query["name"], "$options": "i"}},
-                {"lastName": {"$regex": query["name"], "$options": "i"}},
-            ]
+            # Prefix match on normalized name tokens, served by the
+            # (tenantId, nameTokens, ...) index instead of a regex scan
+            terms = search_terms(query["name"])
+            if terms:
+                mongo_filter.update(tokens_filter(terms))
         if "tenantId" in query and query["tenantId"]:
             mongo_filter["tenantId"] = query["tenantId"]
         if "roleIds" in query and query["roleIds"]:
@@ -126,9 +220,33 @@ class UserService:
         if "email" in query and query["email"]:
             mongo_filter["email"] = query["email"]
         mongo_filter["deletedAt"] = {"$exists": False}
+        return mongo_filter
 
-        log.debug(f"search_users mongo_filter -> {mongo_filter}")
-        return await user_repo.get_all(filter_query=mongo_filter)
+    async def stream_users(
+        self,
+        query: dict,
+        fields: Optional[List[str]] = None,
+        subject: Optional[str] = None,
+        intent: str = READ_PRIMARY,
+    ) -> AsyncIterator[dict]:
+        """
+        Every matching user, for NDJSON exports. The response streams after
+        the route's dependencies have finished, so secondary reads open their
+        own causal session for `subject` here rather than using the request's.
+        """
+        mongo_filter = self._search_filter(query)
+        log.debug(f"stream_users mongo_filter -> {mongo_filter}")
+        session = None
+        if intent != READ_PRIMARY:
+            session = await db.causal_session(subject)
+        try:
+            async for user in user_repo.iter_users(
+                mongo_filter, intent, fields, session=session
+            ):
+                yield user
+        finally:
+            if session is not None:
+                await session.end_session()
 
     async def invite_user(self, user_in: User, performed_by: str) -> User:
         # Create unconfirmed, send email with set password or OTP link?
@@ -157,53 +275,81 @@ class UserService:
         await audit_repo.log_event("DELETE_USER", "users", user_id, performed_by)
         await publish_event("user_events", "USER_DELETED", {"id": user_id})
 
-    async def add_permission(
-        self, user_id: str, permission_ref: MongoRef, performed_by: str
-    ):
-        user = await user_repo.get_by_id(user_id)
-        if not user:
-            raise HTTPException(404, "User not found")
-
-        current_perms = user.permissions or []
-        current_ids = [p.id_obj.get("$oid") for p in current_perms]
-        new_oid = permission_ref.id_obj.get("$oid")
-
-        if new_oid not in current_ids:
-            current_perms.append(permission_ref)
-            await user_repo.update(
-                user_id,
-                {"permissions": [p.model_dump(by_alias=True) for p in current_perms]},
+    async def grant(
+        self,
+        user_ids: List[str],
+        role_ids: List[str],
+        permission_ids: List[str],
+        performed_by: str,
+        action: str = "GRANT_USER_ACCESS",
+    ) -> int:
+        """
+        Add roles and permissions to many users in one atomic update; returns
+        how many users actually changed. Nothing is audited or published if
+        every user already had them.
+        """
+        user_ids = list(dict.fromkeys(user_ids))
+        changed = await user_repo.grant(user_ids, role_ids, permission_ids)
+        if changed:
+            await self._access_changed(
+                user_ids, role_ids, permission_ids, performed_by, action
             )
-            await audit_repo.log_event(
-                "ADD_USER_PERMISSION",
-                "users",
-                user_id,
-                performed_by,
-                {"permission": new_oid},
+        return changed
+
+    async def revoke(
+        self,
+        user_ids: List[str],
+        role_ids: List[str],
+        permission_ids: List[str],
+        performed_by: str,
+        action: str = "REVOKE_USER_ACCESS",
+    ) -> int:
+        """Inverse of grant."""
+        user_ids = list(dict.fromkeys(user_ids))
+        changed = await user_repo.revoke(user_ids, role_ids, permission_ids)
+        if changed:
+            await self._access_changed(
+                user_ids, role_ids, permission_ids, performed_by, action
             )
+        return changed
 
-    async def remove_permission(
-        self, user_id: str, permission_id: str, performed_by: str
+    async def _access_changed(
+        self,
+        user_ids: List[str],
+        role_ids: List[str],
+        permission_ids: List[str],
+        performed_by: str,
+        action: str,
     ):
-        user = await user_repo.get_by_id(user_id)
-        if not user:
+        changes = {"roleIds": role_ids, "permissionIds": permission_ids}
+        await audit_repo.log_events(action, "users", user_ids, performed_by, changes)
+        # Authorization drops its cached grants for these users
+        await publish_event(
+            "user_events", "USER_UPDATED", {"ids": user_ids, "changes": changes}
+        )
+
+    async def _require_user(self, user_id: str):
+        if not await user_repo.get_by_id(user_id, ["_id"]):
             raise HTTPException(404, "User not found")
 
-        current_perms = user.permissions or []
-        new_perms = [p for p in current_perms if p.id_obj.get("$oid") != permission_id]
+    async def add_permission(
+        self, user_id: str, permission_ref: MongoRef, performed_by: str
+    ):
+        permission_id = permission_ref.id_obj.get("$oid")
+        changed = await self.grant(
+            [user_id], [], [permission_id], performed_by, "ADD_USER_PERMISSION"
+        )
+        if not changed:
+            await self._require_user(user_id)
 
-        if len(new_perms) != len(current_perms):
-            await user_repo.update(
-                user_id,
-                {"permissions": [p.model_dump(by_alias=True) for p in new_perms]},
-            )
-            await audit_repo.log_event(
-                "REMOVE_USER_PERMISSION",
-                "users",
-                user_id,
-                performed_by,
-                {"permission": permission_id},
-            )
+    async def remove_permission(
+        self, user_id: str, permission_id: str, performed_by: str
+    ):
+        changed = await self.revoke(
+            [user_id], [], [permission_id], performed_by, "REMOVE_USER_PERMISSION"
+        )
+        if not changed:
+            await self._require_user(user_id)
 
     async def bulk_invite_users(
         self,
@@ -221,9 +367,11 @@ class UserService:
         # Also support mapping without ROLE_ prefix
         role_map.update({r.name.lower().replace("role_", ""): str(r.id) for r in roles})
 
-        success_count = 0
-        errors = []
+        # Every row gets the same placeholder password, so hash it once
+        # instead of paying bcrypt per row
+        placeholder_hash = pwd_context.hash("ChangeMe123!")
 
+        users, rows, errors = [], [], []
         for row in reader:
             try:
                 # Expected headers: FirstName, LastName, Email, PhoneNumber, Role
@@ -244,23 +392,50 @@ class UserService:
                     # You might want to skip or use a default role. Let's error for clarity.
                     # raise ValueError(f"Role {role_name} is invalid")
 
-                user_in = User(
-                    firstName=first_name,
-                    lastName=last_name or "",
-                    email=email,
-                    phone=phone,
-                    tenantId=tenant_id,
-                    roleIds=[role_id] if role_id else [],
-                    password="ChangeMe123!",  # Should probably be random or handled by invite flow
-                    enabled=True,
-                    confirmed=False,
+                users.append(
+                    User(
+                        firstName=first_name,
+                        lastName=last_name or "",
+                        email=email,
+                        phone=phone,
+                        tenantId=tenant_id,
+                        roleIds=[role_id] if role_id else [],
+                        password=placeholder_hash,
+                        enabled=True,
+                        confirmed=False,
+                        createdBy=performed_by,
+                    )
                 )
-
-                await user_service.invite_user(user_in, performed_by)
-                success_count += 1
+                rows.append(row)
             except Exception as e:
                 log.error(f"Error inviting user {row.get('Email')}: {str(e)}")
                 errors.append({"email": row.get("Email"), "error": str(e)})
+
+        # One unordered bulk insert; the unique email index rejects existing
+        # (or repeated) emails per row instead of a lookup per row
+        result = await user_repo.create_many(users) if users else None
+        created_ids = []
+        for item in result.items if result else []:
+            email = rows[item.index].get("Email")
+            if not item.ok:
+                error = (
+                    "Email already exists"
+                    if item.error == "duplicate_key"
+                    else item.error
+                )
+                log.error(f"Error inviting user {email}: {error}")
+                errors.append({"email": email, "error": error})
+                continue
+            created_ids.append(item.id)
+            try:
+                otp = await otp_service.generate_otp(email)
+                await email_service.send_otp_email(email, otp)
+            except Exception as e:
+                log.error(f"Invited {email} but could not send the OTP: {e}")
+                errors.append({"email": email, "error": f"Invite email failed: {e}"})
+
+        await audit_repo.log_events("INVITE_USER", "users", created_ids, performed_by)
+        success_count = len(created_ids)
         return success_count, errors
 
 
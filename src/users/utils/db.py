@@ -1,26 +1,277 @@
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+from pymongo.read_preferences import Primary, SecondaryPreferred
+from bson import json_util
 from users.config.config import config
+from users.utils.redis_client import redis_client
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+import asyncio
+import importlib.util
+import threading
+import time
 from users.config.logging_config import get_logger
 
 log = get_logger(__name__)
 
+# Compressor name -> module pymongo needs for it (zlib is in the stdlib)
+_COMPRESSOR_MODULES = {"zstd": "zstandard", "snappy": "snappy", "zlib": None}
+
+READ_PRIMARY = "primary"
+READ_SECONDARY_PREFERRED = "secondaryPreferred"
+
+# Per-request read routing, set by users.utils.read_routing dependencies
+_read_intent: ContextVar[str] = ContextVar("read_intent", default=READ_PRIMARY)
+_session: ContextVar[Optional[object]] = ContextVar("mongo_session", default=None)
+
+# Upper bounds (ms) of the checkout wait histogram buckets
+CHECKOUT_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000)
+
+
+def available_compressors(requested: str) -> List[str]:
+    """The requested compressors, in order, minus those not installed here."""
+    found = []
+    for name in [c.strip() for c in requested.split(",") if c.strip()]:
+        if name not in _COMPRESSOR_MODULES:
+            log.warning(f"Unknown MongoDB compressor {name}, ignoring")
+            continue
+        module = _COMPRESSOR_MODULES[name]
+        if module and importlib.util.find_spec(module) is None:
+            log.info(f"MongoDB compressor {name} unavailable ({module} not installed)")
+            continue
+        found.append(name)
+    return found
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """
+    Connection pool counters fed by the driver's CMAP events.
+
+    The driver reports events from its own threads, so updates take a lock.
+    Checkout wait is the time a request spent getting a connection, which is
+    what grows when the pool is too small for the traffic.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.created = 0
+        self.closed = 0
+        self.checked_out = 0
+        self.in_use = 0
+        self.checkout_failed = 0
+        self.checkout_timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.wait_buckets = [0] * (len(CHECKOUT_BUCKETS_MS) + 1)
+        # Checkout start per thread: Motor checks out on the calling executor
+        # thread, and older pymongo has no duration on the checked-out event
+        self._checkout = threading.local()
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        log.warning(f"MongoDB pool cleared for {event.address}")
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        with self._lock:
+            self.created += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.closed += 1
+
+    def connection_check_out_started(self, event):
+        self._checkout.started = time.monotonic()
+
+    def connection_check_out_failed(self, event):
+        self._checkout.started = None
+        with self._lock:
+            self.checkout_failed += 1
+            if event.reason == monitoring.ConnectionCheckOutFailedReason.TIMEOUT:
+                self.checkout_timeouts += 1
+
+    def connection_checked_out(self, event):
+        started = getattr(self._checkout, "started", None)
+        self._checkout.started = None
+        wait_ms = (time.monotonic() - started) * 1000 if started is not None else 0.0
+        bucket = 0
+        while (
+            bucket < len(CHECKOUT_BUCKETS_MS) and wait_ms > CHECKOUT_BUCKETS_MS[bucket]
+        ):
+            bucket += 1
+        with self._lock:
+            self.checked_out += 1
+            self.in_use += 1
+            self.wait_total += wait_ms
+            self.wait_max = max(self.wait_max, wait_ms)
+            self.wait_buckets[bucket] += 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.in_use -= 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            labels = [f"le_{b}ms" for b in CHECKOUT_BUCKETS_MS] + ["inf"]
+            return {
+                "connections_open": self.created - self.closed,
+                "connections_in_use": self.in_use,
+                "connections_created": self.created,
+                "checkouts": self.checked_out,
+                "checkout_failed": self.checkout_failed,
+                "checkout_timeouts": self.checkout_timeouts,
+                "checkout_wait_ms": {
+                    "avg": (
+                        round(self.wait_total / self.checked_out, 3)
+                        if self.checked_out
+                        else 0.0
+                    ),
+                    "max": round(self.wait_max, 3),
+                    "histogram": dict(zip(labels, self.wait_buckets)),
+                },
+            }
+
 
 class Database:
     client: AsyncIOMotorClient = None
 
+    def __init__(self):
+        self.pool_metrics = PoolMetrics()
+        self.compressors: List[str] = []
+        self._databases: Dict[str, object] = {}
+
     def connect(self):
         try:
             log.info(f"Connecting to MongoDB at {config.MONGO_URI}")
-            self.client = AsyncIOMotorClient(config.MONGO_URI)
-            # Verify connection
-            # await self.client.admin.command('ping') # Can't await in sync init, do in startup
-            log.info("MongoDB client created")
+            self.compressors = available_compressors(config.MONGO_COMPRESSORS)
+            options = dict(
+                maxPoolSize=config.MONGO_MAX_POOL_SIZE,
+                minPoolSize=config.MONGO_MIN_POOL_SIZE,
+                maxIdleTimeMS=config.MONGO_MAX_IDLE_TIME_MS,
+                waitQueueTimeoutMS=config.MONGO_WAIT_QUEUE_TIMEOUT_MS,
+                serverSelectionTimeoutMS=config.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+                connectTimeoutMS=config.MONGO_CONNECT_TIMEOUT_MS,
+                socketTimeoutMS=config.MONGO_SOCKET_TIMEOUT_MS,
+                event_listeners=[self.pool_metrics],
+            )
+            if self.compressors:
+                options["compressors"] = self.compressors
+            self.client = AsyncIOMotorClient(config.MONGO_URI, **options)
+            self._databases = {}
+            log.info(f"MongoDB client created (compressors: {self.compressors})")
         except Exception as e:
             log.error(f"Error connecting to MongoDB: {e}")
             raise e
 
-    def get_db(self):
-        return self.client[config.MONGO_DB_NAME]
+    async def warm_up(self):
+        """
+        Ping, then open minPoolSize connections at once so the first burst of
+        requests does not pay for TCP/TLS handshakes and authentication.
+        """
+        admin = self.client.admin
+        await admin.command("ping")
+        await asyncio.gather(
+            *[admin.command("ping") for _ in range(config.MONGO_MIN_POOL_SIZE)]
+        )
+        log.info(
+            f"MongoDB pool warmed: {self.pool_metrics.stats()['connections_open']} "
+            "connections open"
+        )
+
+    def get_db(self, intent: Optional[str] = None):
+        """
+        The application database routed by read intent: the given one, else
+        the current request's (primary unless a route asked otherwise).
+        Writes always go to the primary whatever the intent.
+        """
+        intent = intent or _read_intent.get()
+        database = self._databases.get(intent)
+        if database is None:
+            if intent == READ_SECONDARY_PREFERRED:
+                preference = SecondaryPreferred(
+                    max_staleness=config.MONGO_MAX_STALENESS_SECONDS
+                )
+            else:
+                preference = Primary()
+            database = self.client.get_database(
+                config.MONGO_DB_NAME, read_preference=preference
+            )
+            self._databases[intent] = database
+        return database
+
+    def set_read_intent(self, intent: str):
+        _read_intent.set(intent)
+
+    def session(self, intent: Optional[str] = None):
+        """
+        The current request's causally consistent session, if any, for a read
+        routed by `intent`. The session belongs to the request's own read
+        intent, so an explicit other intent (e.g. READ_PRIMARY inside a
+        secondary-read route) gets none.
+        """
+        if intent is not None and intent != _read_intent.get():
+            return None
+        return _session.get()
+
+    def set_session(self, session):
+        _session.set(session)
+
+    async def record_causal_point(self, subject: str):
+        """
+        Remember the primary's operation time after a write by `subject`, so
+        their secondary reads in the next MONGO_CAUSAL_WINDOW_SECONDS wait for
+        it. Standalone servers report no operation time; nothing is stored.
+        """
+        if not subject or not redis_client.client:
+            return
+        try:
+            reply = await self.client.admin.command("ping")
+            if "operationTime" not in reply or "$clusterTime" not in reply:
+                return
+            point = json_util.dumps(
+                {
+                    "operationTime": reply["operationTime"],
+                    "clusterTime": reply["$clusterTime"],
+                }
+            )
+            await redis_client.client.set(
+                f"mongo:causal:{subject}", point, ex=config.MONGO_CAUSAL_WINDOW_SECONDS
+            )
+        except Exception as e:
+            log.error(f"Could not record causal point for {subject}: {e}")
+
+    async def causal_session(self, subject: str):
+        """
+        A causally consistent session advanced to `subject`'s last recorded
+        write, or None when they have not written recently.
+        """
+        if not subject or not redis_client.client:
+            return None
+        try:
+            point = await redis_client.client.get(f"mongo:causal:{subject}")
+        except Exception as e:
+            log.error(f"Could not load causal point for {subject}: {e}")
+            return None
+        if not point:
+            return None
+        point = json_util.loads(point)
+        session = await self.client.start_session(causal_consistency=True)
+        session.advance_cluster_time(point["clusterTime"])
+        session.advance_operation_time(point["operationTime"])
+        return session
+
+    def stats(self) -> dict:
+        return {"compressors": self.compressors, "pool": self.pool_metrics.stats()}
 
     def close(self):
         if self.client:
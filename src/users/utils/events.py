@@ -1,9 +1,13 @@
 from users.utils.redis_client import redis_client
+from typing import Awaitable, Callable, Dict, List, Optional
+import asyncio
 import json
 from users.config.logging_config import get_logger
 
 log = get_logger(__name__)
 
+EventHandler = Callable[[str, dict], Awaitable[None]]
+
 
 async def publish_event(stream_key: str, event_type: str, data: dict):
     """
@@ -21,3 +25,71 @@ async def publish_event(stream_key: str, event_type: str, data: dict):
             log.warning("Redis client not scheduled, event skipped")
     except Exception as e:
         log.error(f"Failed to publish event: {e}")
+
+
+class EventListener:
+    """
+    Tails Redis Streams with plain XREAD (no consumer group), so every worker
+    sees every event and can refresh its own in-memory state.
+    """
+
+    def __init__(self, block_ms: int = 5000):
+        self.block_ms = block_ms
+        self._handlers: Dict[str, List[EventHandler]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(self, stream_key: str, handler: EventHandler):
+        """
+        :param stream_key: The key of the stream (e.g. 'role_events')
+        :param handler: Coroutine called with (event_type, data)
+        """
+        self._handlers.setdefault(stream_key, []).append(handler)
+
+    async def _dispatch(self, stream_key: str, fields: dict):
+        event_type = fields.get("type")
+        try:
+            data = json.loads(fields.get("data") or "{}")
+        except ValueError:
+            data = {}
+        for handler in self._handlers.get(stream_key, []):
+            try:
+                await handler(event_type, data)
+            except Exception as e:
+                log.error(f"Event handler failed for {event_type}: {e}")
+
+    async def _run(self):
+        # Only events published after startup; periodic refreshes in the
+        # subscribers cover anything missed while disconnected.
+        last_ids = {stream_key: "$" for stream_key in self._handlers}
+        while True:
+            try:
+                if not redis_client.client:
+                    await asyncio.sleep(1)
+                    continue
+                response = await redis_client.client.xread(
+                    last_ids, block=self.block_ms
+                )
+                if isinstance(response, dict):
+                    response = response.items()
+                for stream_key, entries in response or []:
+                    for entry_id, fields in entries:
+                        last_ids[stream_key] = entry_id
+                        await self._dispatch(stream_key, fields)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.error(f"Event listener error: {e}")
+                await asyncio.sleep(1)
+
+    def start(self):
+        if self._handlers and self._task is None:
+            log.info(f"Listening for events on {sorted(self._handlers)}")
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+
+event_listener = EventListener()
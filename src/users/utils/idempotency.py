@@ -0,0 +1,172 @@
+from users.utils.redis_client import redis_client
+from users.config.config import config
+from fastapi import HTTPException, Request
+from fastapi.responses import Response
+from typing import Awaitable, Callable, Optional
+import asyncio
+import hashlib
+import json
+import time
+from users.config.logging_config import get_logger
+
+log = get_logger(__name__)
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+
+_PENDING = "pending"
+_DONE = "done"
+
+
+def _digest(*parts) -> str:
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(part if isinstance(part, bytes) else str(part).encode())
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+class Idempotency:
+    """
+    Runs a handler once per Idempotency-Key and replays its response.
+
+    The first request claims the key in Redis (SET NX) and stores its
+    response for IDEMPOTENCY_TTL_SECONDS; repeats with the same key get that
+    response back without running the handler (no second bcrypt hash, OTP or
+    email). A repeat that arrives while the first is still running waits for
+    it. Reusing a key for a different request body is a 422. Without Redis
+    the handler just runs.
+    """
+
+    def __init__(self):
+        self.executed = 0
+        self.replayed = 0
+        self.waited = 0
+
+    def _redis_key(self, request: Request, scope: str, key: str) -> str:
+        return f"idem:{_digest(scope, request.method, request.url.path, key)}"
+
+    async def run(
+        self,
+        request: Request,
+        scope: Optional[str],
+        handler: Callable[[], Awaitable[Response]],
+    ) -> Response:
+        """
+        `scope` keeps callers' keys apart (the caller's sub; None for
+        unauthenticated routes). `handler` does the work and returns the
+        response to remember.
+        """
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key or not redis_client.client:
+            return await handler()
+        if len(key) > MAX_KEY_LENGTH:
+            raise HTTPException(400, f"{IDEMPOTENCY_HEADER} is too long")
+
+        redis_key = self._redis_key(request, scope or "", key)
+        fingerprint = _digest(await request.body())
+        deadline = time.monotonic() + config.IDEMPOTENCY_WAIT_SECONDS
+        delay, waiting = 0.02, False
+        while True:
+            try:
+                claimed = await redis_client.client.set(
+                    redis_key,
+                    json.dumps({"state": _PENDING, "fingerprint": fingerprint}),
+                    nx=True,
+                    ex=config.IDEMPOTENCY_LOCK_SECONDS,
+                )
+                record = None if claimed else await redis_client.client.get(redis_key)
+            except Exception as e:
+                log.error(f"Idempotency store unavailable, running request: {e}")
+                return await handler()
+
+            if claimed:
+                return await self._execute(redis_key, fingerprint, handler)
+            if record is None:
+                continue  # expired between SET and GET; claim again
+            record = json.loads(record)
+            if record["fingerprint"] != fingerprint:
+                raise HTTPException(
+                    422, f"{IDEMPOTENCY_HEADER} was already used for another request"
+                )
+            if record["state"] == _DONE:
+                self.replayed += 1
+                return Response(
+                    content=record["body"],
+                    status_code=record["status"],
+                    media_type=record["mediaType"],
+                    headers={REPLAYED_HEADER: "true"},
+                )
+            if time.monotonic() >= deadline:
+                raise HTTPException(
+                    409, f"A request with this {IDEMPOTENCY_HEADER} is in progress"
+                )
+            if not waiting:
+                self.waited += 1
+                waiting = True
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.5)
+
+    async def _execute(self, redis_key: str, fingerprint: str, handler) -> Response:
+        self.executed += 1
+        try:
+            response = await handler()
+        except HTTPException as e:
+            if e.status_code < 500:
+                # Deterministic outcome (e.g. email taken): replay it too
+                body = json.dumps({"detail": e.detail})
+                await self._store(
+                    redis_key, fingerprint, e.status_code, body, "application/json"
+                )
+            else:
+                await self._release(redis_key)
+            raise
+        except BaseException:
+            # Let the client retry for real
+            await self._release(redis_key)
+            raise
+        if response.status_code < 500:
+            await self._store(
+                redis_key,
+                fingerprint,
+                response.status_code,
+                response.body.decode(),
+                response.media_type,
+            )
+        else:
+            await self._release(redis_key)
+        return response
+
+    async def _store(
+        self, redis_key: str, fingerprint: str, status: int, body: str, media_type
+    ):
+        record = {
+            "state": _DONE,
+            "fingerprint": fingerprint,
+            "status": status,
+            "body": body,
+            "mediaType": media_type,
+        }
+        try:
+            await redis_client.client.set(
+                redis_key, json.dumps(record), ex=config.IDEMPOTENCY_TTL_SECONDS
+            )
+        except Exception as e:
+            log.error(f"Could not store idempotent response: {e}")
+
+    async def _release(self, redis_key: str):
+        try:
+            await redis_client.client.delete(redis_key)
+        except Exception as e:
+            log.error(f"Could not release idempotency key: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "executed": self.executed,
+            "replayed": self.replayed,
+            "waited": self.waited,
+        }
+
+
+idempotency = Idempotency()
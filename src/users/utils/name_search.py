@@ -0,0 +1,56 @@
+"""
+Index-friendly name search.
+
+Each user stores `nameTokens`: the edge n-grams (prefixes) of every word of
+their normalized first and last name. "Ångström-Lee" becomes angstrom and
+lee, stored as a, an, ang, ... and l, le, lee. A search term is normalized
+the same way and must equal one of the stored tokens, which turns a prefix
+search into exact matches on a multikey index instead of a regex scan.
+"""
+
+from typing import Iterable, List
+import re
+import unicodedata
+
+# Longer words are indexed up to this many characters; longer search terms
+# are cut to the same length, so they still match (by their prefix).
+MAX_PREFIX_LENGTH = 20
+
+_WORD_SPLIT = re.compile(r"[\W_]+", re.UNICODE)
+
+
+def normalize(text: str) -> str:
+    """Casefold and strip accents: "Ångström" -> "angstrom"."""
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return stripped.casefold()
+
+
+def words(text: str) -> List[str]:
+    return [w for w in _WORD_SPLIT.split(normalize(text)) if w]
+
+
+def name_tokens(*names: str) -> List[str]:
+    """
+    Every prefix of every word in the given names, deduplicated and sorted.
+    Multi-word names also index their words run together, so "O'Brien" is
+    found by "obrien" as well as by "o brien".
+    """
+    tokens = set()
+    for name in names:
+        parts = words(name)
+        if len(parts) > 1:
+            parts.append("".join(parts))
+        for word in parts:
+            for end in range(1, min(len(word), MAX_PREFIX_LENGTH) + 1):
+                tokens.add(word[:end])
+    return sorted(tokens)
+
+
+def search_terms(query: str) -> List[str]:
+    """Terms a search must all match; "ann lin" finds Annabel Lindqvist."""
+    return list(dict.fromkeys(w[:MAX_PREFIX_LENGTH] for w in words(query)))
+
+
+def tokens_filter(terms: Iterable[str]) -> dict:
+    return {"nameTokens": {"$all": list(terms)}}
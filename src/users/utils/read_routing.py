@@ -0,0 +1,57 @@
+from users.utils.db import db, READ_PRIMARY
+from users.utils.security import get_current_user
+from fastapi import Depends, Request
+from users.config.logging_config import get_logger
+
+log = get_logger(__name__)
+
+
+def read_from(intent: str, auth=get_current_user):
+    """
+    Route a request's reads by `intent` (see users.utils.db).
+
+    For secondary reads, a caller who wrote recently gets a causally
+    consistent session advanced past that write, so they read their own
+    writes; everyone else reads without a session. `auth` must be the same
+    dependency the route authenticates with so the token is resolved once.
+    """
+
+    async def route_reads(token_data=Depends(auth)):
+        db.set_read_intent(intent)
+        session = None
+        if intent != READ_PRIMARY:
+            session = await db.causal_session(token_data.get("sub"))
+        db.set_session(session)
+        try:
+            yield
+        finally:
+            if session is not None:
+                await session.end_session()
+
+    return Depends(route_reads, scope="function")
+
+
+def record_writes(auth=get_current_user):
+    """
+    After a successful non-GET request, remember the caller's causal point so
+    their next reads from secondaries include what they just wrote. Routes
+    marked with read_only() are skipped.
+    """
+
+    async def remember_write(request: Request, token_data=Depends(auth)):
+        yield
+        if request.method != "GET" and not getattr(request.state, "read_only", False):
+            await db.record_causal_point(token_data.get("sub"))
+
+    # "function" scope: recorded before the response goes out, so a client
+    # reading right after it cannot race the bookkeeping.
+    return Depends(remember_write, scope="function")
+
+
+def read_only():
+    """Mark a non-GET route that writes nothing (e.g. a POST search)."""
+
+    def mark_read_only(request: Request):
+        request.state.read_only = True
+
+    return Depends(mark_read_only)
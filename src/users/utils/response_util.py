@@ -1,20 +1,89 @@
 import time
-from typing import Any, Dict
+from typing import Any, AsyncIterator, Dict, Optional
+from bson import ObjectId
+from fastapi import Request
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel
+import orjson
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
 
-def success_response(data: Any, message: str = "Request Successful") -> Dict[str, Any]:
-    return {
-        "status": "success",
-        "message": message,
-        "data": data,
-        "timestamp": int(time.time() * 1000),
-    }
+
+def _encode_default(value: Any) -> Any:
+    """Types orjson does not know; datetimes, dataclasses and enums it does."""
+    if isinstance(value, BaseModel):
+        # Same output as jsonable_encoder: aliases, excluded fields left out
+        return value.model_dump(by_alias=True)
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
 
 
-def failure_response(message: str, data: Any = None) -> Dict[str, Any]:
+class EnvelopeResponse(Response):
+    """
+    JSON response encoded by orjson in one pass, models included.
+
+    FastAPI hands a returned Response through untouched, so envelopes built
+    with the helpers below skip jsonable_encoder's recursive copy and the
+    stdlib json encoder.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content, default=_encode_default, option=orjson.OPT_NON_STR_KEYS
+        )
+
+
+def _envelope(status: str, message: str, data: Any) -> Dict[str, Any]:
     return {
-        "status": "failure",
+        "status": status,
         "message": message,
         "data": data,
         "timestamp": int(time.time() * 1000),
     }
+
+
+def success_response(
+    data: Any, message: str = "Request Successful"
+) -> EnvelopeResponse:
+    return EnvelopeResponse(_envelope("success", message, data))
+
+
+def page_response(
+    data: Any, next_cursor: Optional[str], message: str = "Request Successful"
+) -> EnvelopeResponse:
+    """success_response for one page of a listing; next_cursor is None at the end."""
+    content = _envelope("success", message, data)
+    content["next_cursor"] = next_cursor
+    return EnvelopeResponse(content)
+
+
+def failure_response(message: str, data: Any = None) -> EnvelopeResponse:
+    return EnvelopeResponse(_envelope("failure", message, data))
+
+
+def wants_ndjson(request: Request, stream: bool = False) -> bool:
+    """True for ?stream=true or an Accept header asking for NDJSON."""
+    return stream or NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def ndjson_response(items: AsyncIterator[Any]) -> StreamingResponse:
+    """
+    One JSON document per line, written as `items` yields them: the first
+    line goes out before the last is read, and nothing is held in between.
+    No envelope; an empty listing is an empty body.
+    """
+
+    async def lines():
+        async for item in items:
+            yield orjson.dumps(
+                item,
+                default=_encode_default,
+                option=orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE,
+            )
+
+    return StreamingResponse(lines(), media_type=NDJSON_MEDIA_TYPE)
@@ -0,0 +1,78 @@
+"""
+Serialization of documents the service wrote itself.
+
+Listings used to turn every document into a model (re-running EmailStr and
+friends on data that was validated when it was written) and then dump the
+model again for the response. For trusted reads, compile_serializer builds
+a function that goes straight from a driver document to the JSON-ready dict
+the model would have produced: same keys and order, aliases, defaults for
+missing fields, excluded fields dropped, ObjectId and datetime as strings.
+"""
+
+from bson import ObjectId
+from datetime import datetime
+from pydantic import BaseModel
+from pydantic_core import PydanticUndefined
+from typing import Any, Callable, Iterable, Type
+
+_PASSTHROUGH = (str, int, float, bool, type(None))
+
+
+def json_value(value: Any) -> Any:
+    """A BSON value as pydantic's JSON mode would render it."""
+    if isinstance(value, _PASSTHROUGH):
+        return value
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, dict):
+        return {k: json_value(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [json_value(v) for v in value]
+    return value
+
+
+def _default(field) -> Callable[[], Any]:
+    if field.default_factory is not None:
+        return lambda: json_value(field.default_factory())
+    if field.default is PydanticUndefined:
+        return lambda: None
+    default = field.default
+    if isinstance(default, (list, dict)):
+        # A fresh copy per document, as the model would give
+        return lambda: json_value(default)
+    value = json_value(default)
+    return lambda: value
+
+
+def compile_serializer(
+    model: Type[BaseModel], exclude: Iterable[str] = ()
+) -> Callable[[dict], dict]:
+    """
+    doc -> dict shaped like jsonable_encoder(model.model_validate(doc)),
+    without validation. Only for documents this service wrote: a malformed
+    document is passed through, not rejected.
+    """
+    excluded = set(exclude)
+    plan = []
+    for name, field in model.model_fields.items():
+        if name in excluded or field.exclude:
+            continue
+        key = field.alias or name
+        plan.append((key, _default(field)))
+    plan = tuple(plan)
+
+    def serialize(doc: dict) -> dict:
+        out = {}
+        for key, default in plan:
+            value = doc.get(key, doc)
+            if value is doc:
+                out[key] = default()
+            elif isinstance(value, _PASSTHROUGH):
+                out[key] = value
+            else:
+                out[key] = json_value(value)
+        return out
+
+    return serialize
@@ -0,0 +1,203 @@
+from users.repositories.service_credential_repository import service_credential_repo
+from users.models.domain import ServiceCredential
+from users.utils.redis_client import redis_client
+from users.utils.events import event_listener
+from users.utils.security import RecentIdFilter, oauth2_scheme, validate_token
+from users.config.config import config
+from fastapi import Depends, HTTPException, Request
+from collections import OrderedDict
+from typing import Optional, Tuple
+from urllib.parse import parse_qsl, urlencode
+import hashlib
+import hmac
+import time
+from users.config.logging_config import get_logger
+
+log = get_logger(__name__)
+
+CLIENT_ID_HEADER = "X-Client-Id"
+TIMESTAMP_HEADER = "X-Timestamp"
+NONCE_HEADER = "X-Nonce"
+SIGNATURE_HEADER = "X-Signature"
+MAX_NONCE_LENGTH = 128
+# Cached credentials, known and unknown; misses are driven by unauthenticated
+# client ids, so the cache must stay bounded
+CREDENTIAL_CACHE_SIZE = 1024
+
+
+def derive_signing_key(secret: str) -> str:
+    """The key both sides sign with; only this digest of the secret is stored."""
+    return hashlib.sha256(secret.encode()).hexdigest()
+
+
+def string_to_sign(
+    method: str, path: str, query: str, timestamp: str, nonce: str, body: bytes
+) -> str:
+    canonical_query = urlencode(sorted(parse_qsl(query, keep_blank_values=True)))
+    return "\n".join(
+        [
+            method.upper(),
+            path,
+            canonical_query,
+            timestamp,
+            nonce,
+            hashlib.sha256(body).hexdigest(),
+        ]
+    )
+
+
+def sign_request(
+    signing_key: str,
+    method: str,
+    path: str,
+    query: str,
+    timestamp: str,
+    nonce: str,
+    body: bytes = b"",
+) -> str:
+    """Hex HMAC-SHA256 signature a caller sends in X-Signature."""
+    message = string_to_sign(method, path, query, timestamp, nonce, body)
+    return hmac.new(signing_key.encode(), message.encode(), hashlib.sha256).hexdigest()
+
+
+class ServiceAuthenticator:
+    """
+    Verifies HMAC-signed requests from internal services.
+
+    A request carries its client id, a unix timestamp, a one-time nonce and
+    an HMAC-SHA256 over method, path, sorted query, timestamp, nonce and the
+    body hash. Credentials are cached per worker, so the steady-state cost is
+    one HMAC plus the nonce claim: no JWKS, no RSA.
+    """
+
+    def __init__(self):
+        # client id -> (credential or None if unknown, expires_at), LRU order
+        self._credentials: (
+            "OrderedDict[str, Tuple[Optional[ServiceCredential], float]]"
+        ) = OrderedDict()
+        self.recent_nonces = RecentIdFilter()
+        self.verified = 0
+        self.rejected = 0
+
+    def invalidate(self, client_id: str):
+        self._credentials.pop(client_id, None)
+
+    async def _credential(self, client_id: str) -> Optional[ServiceCredential]:
+        now = time.time()
+        cached = self._credentials.get(client_id)
+        if cached is not None and cached[1] > now:
+            self._credentials.move_to_end(client_id)
+            return cached[0]
+        credential = await service_credential_repo.get_by_client_id(client_id)
+        self._credentials[client_id] = (
+            credential,
+            now + config.SERVICE_CREDENTIAL_CACHE_TTL,
+        )
+        self._credentials.move_to_end(client_id)
+        while len(self._credentials) > CREDENTIAL_CACHE_SIZE:
+            self._credentials.popitem(last=False)
+        return credential
+
+    def _reject(self, detail: str):
+        self.rejected += 1
+        raise HTTPException(status_code=401, detail=detail)
+
+    async def _claim_nonce(self, client_id: str, nonce: str, expires_at: float):
+        key = f"{client_id}:{nonce}"
+        if self.recent_nonces.seen(key, expires_at):
+            log.warning(f"Nonce replay detected locally for {client_id}")
+            self._reject("Request replay detected")
+        self.recent_nonces.add(key, expires_at)
+
+        if not redis_client.client:
+            return
+        try:
+            is_new = await redis_client.client.set(
+                f"svc:nonce:{key}",
+                "1",
+                nx=True,
+                ex=max(1, int(expires_at - time.time())),
+            )
+        except Exception as e:
+            log.error(f"Nonce check failed, allowing request: {e}")
+            return
+        if not is_new:
+            log.warning(f"Nonce replay detected for {client_id}")
+            self._reject("Request replay detected")
+
+    async def authenticate(self, request: Request) -> dict:
+        headers = request.headers
+        client_id = headers.get(CLIENT_ID_HEADER)
+        timestamp = headers.get(TIMESTAMP_HEADER, "")
+        nonce = headers.get(NONCE_HEADER, "")
+        signature = headers.get(SIGNATURE_HEADER, "")
+        if not (client_id and timestamp and nonce and signature):
+            self._reject("Missing service signature headers")
+        if len(nonce) > MAX_NONCE_LENGTH:
+            self._reject("Invalid nonce")
+
+        try:
+            issued_at = int(timestamp)
+        except ValueError:
+            self._reject("Invalid timestamp")
+        if abs(time.time() - issued_at) > config.SERVICE_AUTH_MAX_SKEW_SECONDS:
+            self._reject("Request timestamp outside allowed window")
+
+        credential = await self._credential(client_id)
+        if credential is None or not credential.enabled:
+            log.warning(f"Unknown or disabled service client {client_id}")
+            self._reject("Invalid service credentials")
+
+        expected = sign_request(
+            credential.signingKey,
+            request.method,
+            request.url.path,
+            request.url.query,
+            timestamp,
+            nonce,
+            await request.body(),
+        )
+        if not hmac.compare_digest(expected, signature):
+            log.warning(f"Bad request signature from {client_id}")
+            self._reject("Invalid request signature")
+
+        # A nonce only has to be remembered while its timestamp is acceptable
+        await self._claim_nonce(
+            client_id, nonce, issued_at + config.SERVICE_AUTH_MAX_SKEW_SECONDS
+        )
+        self.verified += 1
+        return {
+            "sub": client_id,
+            "client_id": client_id,
+            "roles": credential.roles,
+            "tenantId": credential.tenantId,
+            "auth_type": "service",
+        }
+
+    async def _on_credential_event(self, event_type: str, data: dict):
+        client_id = data.get("clientId")
+        if client_id:
+            self.invalidate(client_id)
+
+    def start(self):
+        event_listener.subscribe("service_credential_events", self._on_credential_event)
+
+    def stats(self) -> dict:
+        return {
+            "cached_credentials": len(self._credentials),
+            "nonces_in_process": len(self.recent_nonces),
+            "verified": self.verified,
+            "rejected": self.rejected,
+        }
+
+
+service_authenticator = ServiceAuthenticator()
+
+
+async def validate_token_or_service(
+    request: Request, token: str = Depends(oauth2_scheme)
+):
+    """Accept a signed service request if it names a client, else a bearer JWT."""
+    if request.headers.get(CLIENT_ID_HEADER):
+        return await service_authenticator.authenticate(request)
+    return await validate_token(token)
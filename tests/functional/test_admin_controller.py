@@ -114,3 +114,149 @@ class TestAdminController:
         search_resp = api_client.post("admin/users/search", data=search_payload)
         assert search_resp.status_code == 200
         assert len(search_resp.json()["data"]) == 0
+
+    def test_grant_and_revoke_users(self, api_client, db):
+        user_ids = []
+        for name in ("GrantA", "GrantB"):
+            payload = {
+                "firstName": "TestUser",
+                "lastName": name,
+                "email": f"{name.lower()}@example.com",
+                "password": "Password123!",
+                "tenantId": "test-tenant",
+            }
+            create_resp = api_client.post("admins/create-user", data=payload)
+            user_ids.append(create_resp.json()["data"]["_id"])
+        self.created_user_ids += user_ids
+
+        grants = {"userIds": user_ids, "permissionIds": ["p-1", "p-2"]}
+        response = api_client.post("admin/users/grants", data=grants)
+        assert response.status_code == 200
+        assert response.json()["data"]["modified"] == 2
+
+        # Granting again changes nothing
+        response = api_client.post("admin/users/grants", data=grants)
+        assert response.json()["data"]["modified"] == 0
+
+        response = api_client.delete(
+            "admin/users/grants", data={"userIds": user_ids, "permissionIds": ["p-1"]}
+        )
+        assert response.json()["data"]["modified"] == 2
+        for user_id in user_ids:
+            doc = db.users.find_one({"_id": ObjectId(user_id)})
+            assert doc["permissionIds"] == ["p-2"]
+
+    def test_update_user_no_op_not_audited(self, api_client, db):
+        payload = {
+            "firstName": "TestUser",
+            "lastName": "NoOp",
+            "email": "noop_user@example.com",
+            "password": "Password123!",
+            "tenantId": "test-tenant",
+        }
+        create_resp = api_client.post("admins/create-user", data=payload)
+        user_id = create_resp.json()["data"]["_id"]
+        self.created_user_ids.append(user_id)
+
+        update_payload = {"firstName": "Changed", "lastName": "NoOp"}
+        for _ in range(3):
+            response = api_client.put(f"admin/user/{user_id}", data=update_payload)
+            assert response.status_code == 200
+
+        audits = list(
+            db.audit_logs.find({"action": "UPDATE_USER", "target_id": user_id})
+        )
+        assert len(audits) == 1
+        # Only the field that actually changed is recorded
+        assert audits[0]["details"]["changes"] == {"firstName": "Changed"}
+        assert audits[0]["details"]["previous"] == {"firstName": "TestUser"}
+
+    def test_update_user_password_not_audited(self, api_client, db):
+        payload = {
+            "firstName": "TestUser",
+            "lastName": "Secret",
+            "email": "secret_user@example.com",
+            "password": "Password123!",
+            "tenantId": "test-tenant",
+        }
+        create_resp = api_client.post("admins/create-user", data=payload)
+        user_id = create_resp.json()["data"]["_id"]
+        self.created_user_ids.append(user_id)
+        old_hash = db.users.find_one({"_id": ObjectId(user_id)})["password"]
+
+        response = api_client.put(
+            f"admin/user/{user_id}", data={"password": "$2b$12$replacementhash"}
+        )
+        assert response.status_code == 200
+
+        audit = db.audit_logs.find_one({"action": "UPDATE_USER", "target_id": user_id})
+        assert audit["details"]["changes"] == {"password": "<changed>"}
+        assert audit["details"]["previous"] == {"password": "<changed>"}
+        assert old_hash not in str(audit["details"])
+
+    def test_get_users_batch(self, api_client):
+        payload = {
+            "firstName": "TestUser",
+            "lastName": "Batch",
+            "email": "batch_user@example.com",
+            "password": "Password123!",
+            "tenantId": "test-tenant",
+        }
+        create_resp = api_client.post("admins/create-user", data=payload)
+        user_id = create_resp.json()["data"]["_id"]
+        self.created_user_ids.append(user_id)
+
+        missing = str(ObjectId())
+        response = api_client.post(
+            "admin/users/batch",
+            data={"ids": [missing, user_id], "emails": ["batch_user@example.com"]},
+            params={"fields": "id,email"},
+        )
+        assert response.status_code == 200
+        results = response.json()["data"]
+        assert [r["key"] for r in results] == [
+            missing,
+            user_id,
+            "batch_user@example.com",
+        ]
+        assert [r["found"] for r in results] == [False, True, True]
+        assert results[1]["user"] == {"_id": user_id, "email": payload["email"]}
+        assert results[2]["user"]["_id"] == user_id
+
+    def _create_policy(self, api_client, db):
+        db.policies.delete_many({"name": "update_validation_policy"})
+        response = api_client.post(
+            "admin/policy",
+            data={
+                "name": "update_validation_policy",
+                "actions": ["policy_test.read"],
+                "condition": "subject.active == True",
+            },
+        )
+        assert response.status_code == 200
+        return response.json()["data"]["_id"]
+
+    def test_update_policy_bad_effect(self, api_client, db):
+        policy_id = self._create_policy(api_client, db)
+        try:
+            response = api_client.put(
+                f"admin/policy/{policy_id}", data={"effect": "maybe"}
+            )
+            assert response.status_code == 400
+            doc = db.policies.find_one({"_id": ObjectId(policy_id)})
+            assert doc["effect"] == "allow"
+            assert doc["version"] == 1
+        finally:
+            db.policies.delete_one({"_id": ObjectId(policy_id)})
+
+    def test_update_policy_bad_condition(self, api_client, db):
+        policy_id = self._create_policy(api_client, db)
+        try:
+            response = api_client.put(
+                f"admin/policy/{policy_id}", data={"condition": "__import__('os')"}
+            )
+            assert response.status_code == 400
+            doc = db.policies.find_one({"_id": ObjectId(policy_id)})
+            assert doc["condition"] == "subject.active == True"
+        finally:
+            db.policies.delete_one({"_id": ObjectId(policy_id)})
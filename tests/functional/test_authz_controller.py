@@ -0,0 +1,109 @@
+import json
+import pytest
+import requests
+from bson import ObjectId
+from tests.utils.api_client import APIClient
+from tests.utils.signing import signed_headers
+
+
+class TestAuthzController:
+    @pytest.fixture(autouse=True)
+    def setup_authz_data(self, api_client: APIClient, db):
+        # Cleanup first just in case
+        db.permissions.delete_many({"name": "authz_test.read"})
+        db.roles.delete_many({"name": "ROLE_AUTHZ_TEST"})
+        db.users.delete_many({"email": "authz_user@test.com"})
+
+        # Created through the API so the service's permission table sees them
+        perm_resp = api_client.post(
+            "admin/permission", data={"name": "authz_test.read"}
+        )
+        assert perm_resp.status_code == 200
+        self.permission_id = perm_resp.json()["data"]["_id"]
+
+        role_resp = api_client.post(
+            "admin/role",
+            data={"name": "ROLE_AUTHZ_TEST", "permissionIds": [self.permission_id]},
+        )
+        assert role_resp.status_code == 200
+        role_id = role_resp.json()["data"]["_id"]
+
+        self.user_id = str(
+            db.users.insert_one(
+                {
+                    "email": "authz_user@test.com",
+                    "password": "x",
+                    "roleIds": [role_id],
+                    "tenantId": "authz-tenant",
+                    "enabled": True,
+                    "confirmed": True,
+                    "firstName": "Z",
+                    "lastName": "Z",
+                }
+            ).inserted_id
+        )
+
+        yield
+
+        db.users.delete_one({"_id": ObjectId(self.user_id)})
+        db.roles.delete_one({"_id": ObjectId(role_id)})
+        db.permissions.delete_one({"_id": ObjectId(self.permission_id)})
+
+    def test_check_batch(self, api_client):
+        checks = [
+            {
+                "subject": self.user_id,
+                "action": "authz_test.read",
+                "tenantId": "authz-tenant",
+            },
+            {"subject": self.user_id, "action": self.permission_id},
+            {"subject": self.user_id, "action": "authz_test.read", "tenantId": "other"},
+            {"subject": self.user_id, "action": "authz_test.missing"},
+            {"subject": str(ObjectId()), "action": "authz_test.read"},
+        ]
+        response = api_client.post("authz/check", data={"checks": checks})
+        assert response.status_code == 200
+        results = response.json()["data"]
+
+        assert [r["allowed"] for r in results] == [True, True, False, False, False]
+        assert [r["subject"] for r in results] == [c["subject"] for c in checks]
+
+    def test_check_batch_too_large(self, api_client):
+        checks = [{"subject": self.user_id, "action": "authz_test.read"}] * 10001
+        response = api_client.post("authz/check", data={"checks": checks})
+        assert response.status_code == 400
+
+    def test_service_credential_limited_to_its_tenant(self, api_client):
+        # Issued for the admin's own tenant, not authz-tenant
+        response = api_client.post(
+            "admin/service-credential", data={"name": "authz-test"}
+        )
+        assert response.status_code == 200
+        credential = response.json()["data"]
+        client_id = credential["clientId"]
+
+        def check(tenant_id):
+            body = json.dumps(
+                {
+                    "checks": [
+                        {
+                            "subject": self.user_id,
+                            "action": "authz_test.read",
+                            "tenantId": tenant_id,
+                        }
+                    ]
+                }
+            ).encode()
+            headers = signed_headers(
+                client_id, credential["clientSecret"], "POST", "/authz/check", body
+            )
+            headers["Content-Type"] = "application/json"
+            return requests.post(
+                f"{api_client.base_url}/authz/check", data=body, headers=headers
+            )
+
+        # Another tenant, and a subject from another tenant
+        assert check("authz-tenant").status_code == 403
+        assert check(credential["tenantId"]).status_code == 403
+
+        api_client.delete("admin/service-credential", data={"clientId": client_id})
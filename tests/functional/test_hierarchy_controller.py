@@ -1,5 +1,10 @@
+import json
+
 import pytest
+import requests
+from tests.config.settings import settings
 from tests.utils.api_client import APIClient
+from tests.utils.signing import signed_headers
 
 
 class TestHierarchyController:
@@ -79,3 +84,105 @@ class TestHierarchyController:
         emails = [u["email"] for u in users]
         assert "h_annotator@test.com" in emails
         assert "h_reviewer@test.com" not in emails
+
+    def test_get_users_sparse_fields(self, api_client):
+        response = api_client.get(
+            "hierarchy/tenant/h-tenant/users", params={"fields": "id,firstName,email"}
+        )
+        assert response.status_code == 200
+        users = response.json()["data"]
+        assert users
+        for u in users:
+            assert set(u) == {"_id", "firstName", "email"}
+
+        response = api_client.get(
+            "hierarchy/tenant/h-tenant/users", params={"fields": "id,password"}
+        )
+        assert response.status_code == 400
+
+    def test_get_users_paged(self, api_client):
+        emails, cursor, pages = [], None, 0
+        while True:
+            params = {"limit": 1, "fields": "id,email"}
+            if cursor:
+                params["cursor"] = cursor
+            response = api_client.get("hierarchy/tenant/h-tenant/users", params=params)
+            assert response.status_code == 200
+            body = response.json()
+            assert len(body["data"]) <= 1
+            emails += [u["email"] for u in body["data"]]
+            pages += 1
+            cursor = body["next_cursor"]
+            if not cursor:
+                break
+        assert len(emails) == len(set(emails))
+        assert set(self.created_emails) <= set(emails)
+
+        response = api_client.get(
+            "hierarchy/tenant/h-tenant/users", params={"cursor": "not-a-cursor"}
+        )
+        assert response.status_code == 400
+
+    def test_get_users_stream(self, api_client):
+        response = api_client.get(
+            "hierarchy/tenant/h-tenant/users", params={"stream": "true"}
+        )
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        users = [json.loads(line) for line in response.text.splitlines()]
+        emails = [u["email"] for u in users]
+        assert len(emails) == len(set(emails))
+        assert set(self.created_emails) <= set(emails)
+        assert all("password" not in u and "nameTokens" not in u for u in users)
+
+    def test_service_credential_call(self, api_client):
+        response = api_client.post(
+            "admin/service-credential",
+            data={"name": "hierarchy-test"},
+        )
+        assert response.status_code == 200
+        credential = response.json()["data"]
+        client_id = credential["clientId"]
+        # Pinned to the issuing admin's tenant
+        assert credential["tenantId"] == settings.DEFAULT_TENANT_ID
+
+        path = f"/hierarchy/tenant/{settings.DEFAULT_TENANT_ID}/users"
+        url = f"{api_client.base_url}{path}"
+        headers = signed_headers(client_id, credential["clientSecret"], "GET", path)
+        response = requests.get(url, headers=headers)
+        assert response.status_code == 200
+        emails = [u["email"] for u in response.json()["data"]]
+        assert settings.ADMIN_EMAIL in emails
+
+        # The same nonce cannot be used twice
+        assert requests.get(url, headers=headers).status_code == 401
+
+        bad = signed_headers(client_id, "wrong-secret", "GET", path)
+        assert requests.get(url, headers=bad).status_code == 401
+
+        api_client.delete("admin/service-credential", data={"clientId": client_id})
+        headers = signed_headers(client_id, credential["clientSecret"], "GET", path)
+        assert requests.get(url, headers=headers).status_code == 401
+
+    def test_service_credential_other_tenant(self, api_client):
+        response = api_client.post(
+            "admin/service-credential",
+            data={"name": "hierarchy-other-tenant"},
+        )
+        assert response.status_code == 200
+        credential = response.json()["data"]
+        client_id = credential["clientId"]
+
+        path = "/hierarchy/tenant/h-tenant/users"
+        url = f"{api_client.base_url}{path}"
+        headers = signed_headers(client_id, credential["clientSecret"], "GET", path)
+        assert requests.get(url, headers=headers).status_code == 403
+
+        api_client.delete("admin/service-credential", data={"clientId": client_id})
+
+    def test_service_credential_for_other_tenant_denied(self, api_client):
+        response = api_client.post(
+            "admin/service-credential",
+            data={"name": "hierarchy-foreign", "tenantId": "h-tenant"},
+        )
+        assert response.status_code == 403
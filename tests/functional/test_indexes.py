@@ -0,0 +1,7 @@
+from users.repositories.indexes import QUERY_SHAPES, find_collscans
+
+
+class TestIndexes:
+    def test_no_query_shape_scans_a_collection(self, db):
+        assert QUERY_SHAPES
+        assert find_collscans(db) == []
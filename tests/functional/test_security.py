@@ -0,0 +1,72 @@
+import time
+import uuid
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from users.config.config import config
+from users.utils.redis_client import redis_client
+from users.services.authorization_service import authorization_service
+from users.services.policy_service import policy_service
+from users.utils.security import (
+    get_current_user,
+    require_permission,
+    require_policy,
+    require_role,
+)
+
+
+class TestReplayProtection:
+    """In-process: the jti is claimed once per request, however many checkers."""
+
+    @pytest.fixture(autouse=True)
+    def replay_protection(self, monkeypatch):
+        monkeypatch.setattr(config, "JWT_REPLAY_PROTECTION", True)
+        # No Redis: the in-process filter alone decides
+        monkeypatch.setattr(redis_client, "client", None)
+        self.claims = {
+            "sub": "replay-user",
+            "roles": ["ROLE_ADMIN", "ROLE_USER"],
+            "jti": uuid.uuid4().hex,
+            "exp": int(time.time()) + 300,
+        }
+
+    def client_for(self, *checkers):
+        app = FastAPI()
+
+        @app.get("/guarded", dependencies=[Depends(c) for c in checkers])
+        def guarded():
+            return {"ok": True}
+
+        app.dependency_overrides[get_current_user] = lambda: dict(self.claims)
+        return TestClient(app)
+
+    def test_two_checkers_claim_jti_once(self):
+        client = self.client_for(require_role("ROLE_ADMIN"), require_role("ROLE_USER"))
+        assert client.get("/guarded").status_code == 200
+        # The same token again is a replay
+        response = client.get("/guarded")
+        assert response.status_code == 401
+        assert response.json()["detail"] == "Token replay detected"
+
+    def test_role_and_permission_checkers(self, monkeypatch):
+        async def has_permissions(token_data, permissions):
+            return True
+
+        monkeypatch.setattr(authorization_service, "has_permissions", has_permissions)
+        client = self.client_for(
+            require_role("ROLE_ADMIN"), require_permission("users.read")
+        )
+        assert client.get("/guarded").status_code == 200
+        assert client.get("/guarded").status_code == 401
+
+    def test_role_and_policy_checkers(self, monkeypatch):
+        async def subject_attributes(token_data):
+            return {}
+
+        monkeypatch.setattr(
+            authorization_service, "subject_attributes", subject_attributes
+        )
+        monkeypatch.setattr(policy_service, "evaluate", lambda action, ctx: True)
+        client = self.client_for(require_role("ROLE_ADMIN"), require_policy("read"))
+        assert client.get("/guarded").status_code == 200
+        assert client.get("/guarded").status_code == 401
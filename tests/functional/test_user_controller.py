@@ -1,4 +1,7 @@
+import uuid
+
 import pytest
+import requests
 from passlib.context import CryptContext
 from tests.utils.api_client import APIClient
 
@@ -27,6 +30,31 @@ class TestUserController:
         # Cleanup
         db.users.delete_one({"email": payload["email"]})
 
+    def test_register_user_idempotent(self, anonymous_client: APIClient, db):
+        payload = {
+            "email": test_email,
+            "password": "Password123!",
+            "firstName": "Public",
+            "lastName": "User",
+            "tenantId": "self",
+        }
+        db.users.delete_one({"email": payload["email"]})
+
+        url = f"{anonymous_client.base_url}/user/register"
+        headers = {"Idempotency-Key": str(uuid.uuid4())}
+        first = requests.post(url, json=payload, headers=headers)
+        retry = requests.post(url, json=payload, headers=headers)
+        assert first.status_code == retry.status_code == 200
+        assert retry.headers.get("Idempotent-Replayed") == "true"
+        assert retry.json() == first.json()
+        assert db.users.count_documents({"email": payload["email"]}) == 1
+
+        # The same key with a different body is refused
+        other = requests.post(url, json={**payload, "firstName": "X"}, headers=headers)
+        assert other.status_code == 422
+
+        db.users.delete_one({"email": payload["email"]})
+
     def test_forgot_password(self, anonymous_client: APIClient, db):
         # We need an existing user
         email = test_email
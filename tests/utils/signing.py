@@ -0,0 +1,25 @@
+import hashlib
+import hmac
+import time
+import uuid
+
+
+def signed_headers(
+    client_id: str, secret: str, method: str, path: str, body: bytes = b""
+) -> dict:
+    """Headers for an HMAC-signed service call with no query string."""
+    signing_key = hashlib.sha256(secret.encode()).hexdigest()
+    timestamp = str(int(time.time()))
+    nonce = uuid.uuid4().hex
+    message = "\n".join(
+        [method, path, "", timestamp, nonce, hashlib.sha256(body).hexdigest()]
+    )
+    signature = hmac.new(
+        signing_key.encode(), message.encode(), hashlib.sha256
+    ).hexdigest()
+    return {
+        "X-Client-Id": client_id,
+        "X-Timestamp": timestamp,
+        "X-Nonce": nonce,
+        "X-Signature": signature,
+    }